@@ -1,13 +1,55 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
 
-engine = create_async_engine(settings.database_url, echo=settings.debug)
+def _database_url(url: str) -> str:
+    """Use the async driver for plain PostgreSQL URLs (postgres:// or postgresql://)"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+
+def _engine_options(url: str) -> dict:
+    options = {"echo": settings.database_echo, "pool_pre_ping": True}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # In-memory SQLite lives in a single connection, so it cannot be pooled
+        if parsed.database in (None, "", ":memory:"):
+            return options
+        # File databases default to NullPool (a new connection per session); pool them instead
+        options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle
+    )
+    return options
+
+
+DATABASE_URL = _database_url(settings.database_url)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run alongside the writer; NORMAL sync is safe with WAL"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+        cursor.close()
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -21,5 +63,8 @@ async def get_db():
 
 
 async def init_db():
+    """Create missing tables, then apply pending schema migrations"""
+    from app.migrations import upgrade
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def _create_index(conn: Connection, table_name: str, index_name: str, columns: list[str]):
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})"))
+
+
+def _drop_index(conn: Connection, table_name: str, index_name: str):
+    if index_name in {index["name"] for index in inspect(conn).get_indexes(table_name)}:
+        conn.execute(text(f"DROP INDEX {index_name}"))
+
+
+def initial_schema(conn: Connection):
+    """Tables come from Base.metadata.create_all; this marks the baseline"""
+
+
+def composite_indexes(conn: Connection):
+    """(user_id, ...) composite indexes for the hot per-user queries.
+
+    They lead with user_id, so the old single-column user_id indexes are
+    redundant and dropped.
+    """
+    _create_index(conn, "chat_history", "ix_chat_history_user_session_created", ["user_id", "session_id", "created_at"])
+    _create_index(conn, "chat_history", "ix_chat_history_user_created", ["user_id", "created_at"])
+    _create_index(conn, "portfolio_holdings", "ix_portfolio_holdings_user_symbol", ["user_id", "symbol"])
+    _create_index(conn, "stock_watchlist", "ix_stock_watchlist_user_symbol", ["user_id", "symbol"])
+    _drop_index(conn, "chat_history", "ix_chat_history_user_id")
+    _drop_index(conn, "portfolio_holdings", "ix_portfolio_holdings_user_id")
+    _drop_index(conn, "stock_watchlist", "ix_stock_watchlist_user_id")
+
+
+def position_user_index(conn: Connection):
+    """uq_position_user_symbol leads with user_id, so its own index is redundant"""
+    _drop_index(conn, "portfolio_positions", "ix_portfolio_positions_user_id")
+
+
+# Applied in order, each exactly once; append new migrations, never reorder.
+# Migrations spell out their own DDL instead of reading the models, which keep changing
+MIGRATIONS: list[tuple[str, Callable[[Connection], None]]] = [
+    ("0001_initial_schema", initial_schema),
+    ("0002_composite_indexes", composite_indexes),
+    ("0003_position_user_index", position_user_index),
+]
+
+
+def applied_versions(conn: Connection) -> set[str]:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(conn: Connection) -> list[str]:
+    """Apply pending migrations in order and return their versions"""
+    applied = applied_versions(conn)
+    pending = [(version, migrate) for version, migrate in MIGRATIONS if version not in applied]
+    for version, migrate in pending:
+        migrate(conn)
+        conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+        print(f"🗄️ Applied migration {version}")
+    return [version for version, _ in pending]
+
+
+if __name__ == "__main__":
+    # python -m app.migrations: create missing tables and apply pending migrations
+    from app.database import init_db
+    asyncio.run(init_db())
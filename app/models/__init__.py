@@ -1,4 +1,4 @@
-from app.models.user import User, ChatHistory, CalculatorHistory
-from app.models.portfolio import PortfolioHolding, StockWatchlist
+from app.models.user import User, ChatHistory, ChatSession, CalculatorHistory
+from app.models.portfolio import PortfolioHolding, PortfolioPosition, StockWatchlist, WatchlistAlert
 
-__all__ = ["User", "ChatHistory", "CalculatorHistory", "PortfolioHolding", "StockWatchlist"]
+__all__ = ["User", "ChatHistory", "ChatSession", "CalculatorHistory", "PortfolioHolding", "PortfolioPosition", "StockWatchlist", "WatchlistAlert"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Date, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -6,9 +6,10 @@ from app.database import Base
 class PortfolioHolding(Base):
     """User's investment holdings"""
     __tablename__ = "portfolio_holdings"
+    __table_args__ = (Index("ix_portfolio_holdings_user_symbol", "user_id", "symbol"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symbol = Column(String(20), nullable=False)  # Stock symbol (e.g., RELIANCE, TCS)
     company_name = Column(String(255), nullable=False)
     quantity = Column(Float, nullable=False)
@@ -19,14 +20,49 @@ class PortfolioHolding(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+class PortfolioPosition(Base):
+    """Per-user, per-symbol consolidation of holding lots, kept in step with PortfolioHolding"""
+    __tablename__ = "portfolio_positions"
+    __table_args__ = (UniqueConstraint("user_id", "symbol", name="uq_position_user_symbol"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    symbol = Column(String(20), nullable=False)
+    quantity = Column(Float, nullable=False, default=0)
+    total_cost = Column(Float, nullable=False, default=0)  # Sum of quantity * buy_price over lots
+    lots = Column(Integer, nullable=False, default=0)
+    realized_pnl = Column(Float, nullable=False, default=0)  # Booked on sells; lots are only bought today
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def average_cost(self) -> float:
+        """Weighted average buy price"""
+        return self.total_cost / self.quantity if self.quantity else 0.0
+
+
 class StockWatchlist(Base):
     """User's watchlist of stocks to monitor"""
     __tablename__ = "stock_watchlist"
+    __table_args__ = (Index("ix_stock_watchlist_user_symbol", "user_id", "symbol"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symbol = Column(String(20), nullable=False)
     company_name = Column(String(255), nullable=False)
     target_price = Column(Float)  # Price alert target
     notes = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WatchlistAlert(Base):
+    """A watchlist target price that the market crossed"""
+    __tablename__ = "watchlist_alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    watchlist_id = Column(Integer, ForeignKey("stock_watchlist.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    symbol = Column(String(20), nullable=False)
+    target_price = Column(Float, nullable=False)
+    trigger_price = Column(Float, nullable=False)  # Price of the tick that crossed the target
+    direction = Column(String(10), nullable=False)  # "above" (rose to target) or "below" (fell to target)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -20,15 +20,29 @@ class User(Base):
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
+    __table_args__ = (
+        # History is read per user (optionally per session), newest first
+        Index("ix_chat_history_user_session_created", "user_id", "session_id", "created_at"),
+        Index("ix_chat_history_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(Integer)
     session_id = Column(String(100), index=True)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class ChatSession(Base):
+    """Conversation state for the AI assistant (used by the database session store)"""
+    __tablename__ = "chat_sessions"
+
+    session_id = Column(String(100), primary_key=True)
+    data = Column(Text, nullable=False)  # JSON: {"messages": [...], "summary": [...]}
+    updated_at = Column(DateTime, index=True, nullable=False)
+
+
 class CalculatorHistory(Base):
     __tablename__ = "calculator_history"
 
@@ -1,13 +1,14 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.responses import RedirectResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
 from app.services.auth import (
-    authenticate_user, create_user, get_user_by_email,
-    get_user_by_username, create_access_token, get_current_user
+    authenticate_user, create_user, create_access_token, get_current_user,
+    password_hasher, identity_cache
 )
 from app.config import settings
 from app.models.user import User
@@ -18,24 +19,20 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/signup", response_model=UserResponse)
 async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
-    # Check if email exists
-    existing_user = await get_user_by_email(db, user_data.email)
-    if existing_user:
+    # The unique indexes on email and username reject duplicates in the INSERT itself
+    try:
+        return await create_user(db, user_data)
+    except IntegrityError as e:
+        await db.rollback()
+        # SQLite names the column (users.email), PostgreSQL the unique index (ix_users_email);
+        # a bare "email" could also match the duplicate value in PostgreSQL's DETAIL line
+        message = str(e.orig)
+        duplicate_email = "users.email" in message or "ix_users_email" in message
+        detail = "Email already registered" if duplicate_email else "Username already taken"
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=detail
         )
-    
-    # Check if username exists
-    existing_user = await get_user_by_username(db, user_data.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-    
-    user = await create_user(db, user_data)
-    return user
 
 
 @router.post("/login", response_model=Token)
@@ -71,8 +68,11 @@ async def login(
 
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
     """Logout and clear cookie"""
+    token = request.cookies.get("access_token")
+    if token:
+        identity_cache.invalidate_token(token)
     response.delete_cookie(key="access_token")
     return {"message": "Logged out successfully"}
 
@@ -88,3 +88,9 @@ async def get_current_user_info(
             detail="Not authenticated"
         )
     return current_user
+
+
+@router.get("/hash-stats")
+async def get_hash_stats():
+    """Password hashing pool load: in-flight, queued and rejected requests"""
+    return password_hasher.stats()
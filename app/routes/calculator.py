@@ -1,24 +1,28 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import json
 
-from app.database import get_db
 from app.schemas import (
     FutureValueInput, LoanEMIInput, SavingsPlanInput,
-    MortgageInput, InvestmentReturnInput, CalculatorResult
+    MortgageInput, InvestmentReturnInput, CalculatorResult,
+    CalculatorBatchInput, CalculatorBatchResult, AmortizationScheduleInput,
+    GoalSimulationInput
 )
 from app.services.calculator import (
     calculate_future_value, calculate_loan_emi, calculate_savings_plan,
-    calculate_mortgage, calculate_investment_return
+    calculate_mortgage, calculate_investment_return,
+    calculate_future_value_batch, calculate_loan_emi_batch, calculate_mortgage_batch,
+    stream_amortization, simulate_savings_goal, simulation_pool
 )
 from app.services.auth import get_current_user
+from app.services.history import history_writer
 from app.models.user import User, CalculatorHistory
 
 router = APIRouter(prefix="/calculator", tags=["Financial Calculators"])
 
 
 async def save_calculation(
-    db: AsyncSession,
     user: User,
     calc_type: str,
     inputs: dict,
@@ -26,71 +30,102 @@ async def save_calculation(
 ):
     """Save calculation to history if user is logged in"""
     if user:
-        history = CalculatorHistory(
+        await history_writer.add(
+            CalculatorHistory,
             user_id=user.id,
             calculator_type=calc_type,
             inputs=json.dumps(inputs),
             result=json.dumps(result)
         )
-        db.add(history)
-        await db.commit()
 
 
 @router.post("/future-value", response_model=CalculatorResult)
 async def api_future_value(
     data: FutureValueInput,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate future value with compound interest"""
     result = calculate_future_value(data)
-    await save_calculation(db, current_user, "future_value", data.model_dump(), result.model_dump())
+    await save_calculation(current_user, "future_value", data.model_dump(), result.model_dump())
     return result
 
 
 @router.post("/loan-emi", response_model=CalculatorResult)
 async def api_loan_emi(
     data: LoanEMIInput,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate loan EMI (Equated Monthly Installment)"""
     result = calculate_loan_emi(data)
-    await save_calculation(db, current_user, "loan_emi", data.model_dump(), result.model_dump())
+    await save_calculation(current_user, "loan_emi", data.model_dump(), result.model_dump())
     return result
 
 
 @router.post("/savings-plan", response_model=CalculatorResult)
 async def api_savings_plan(
     data: SavingsPlanInput,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate savings plan growth"""
     result = calculate_savings_plan(data)
-    await save_calculation(db, current_user, "savings_plan", data.model_dump(), result.model_dump())
+    await save_calculation(current_user, "savings_plan", data.model_dump(), result.model_dump())
+    return result
+
+
+@router.post("/goal-simulation", response_model=CalculatorResult)
+async def api_goal_simulation(
+    data: GoalSimulationInput,
+    current_user: User = Depends(get_current_user)
+):
+    """Monte Carlo savings plan: percentile bands and probability of reaching a goal"""
+    result = await run_in_threadpool(simulate_savings_goal, data, simulation_pool())
+    await save_calculation(current_user, "goal_simulation", data.model_dump(), result.model_dump())
     return result
 
 
 @router.post("/mortgage", response_model=CalculatorResult)
 async def api_mortgage(
     data: MortgageInput,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate mortgage payments"""
     result = calculate_mortgage(data)
-    await save_calculation(db, current_user, "mortgage", data.model_dump(), result.model_dump())
+    await save_calculation(current_user, "mortgage", data.model_dump(), result.model_dump())
     return result
 
 
 @router.post("/investment-return", response_model=CalculatorResult)
 async def api_investment_return(
     data: InvestmentReturnInput,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate investment returns"""
     result = calculate_investment_return(data)
-    await save_calculation(db, current_user, "investment_return", data.model_dump(), result.model_dump())
+    await save_calculation(current_user, "investment_return", data.model_dump(), result.model_dump())
     return result
+
+
+@router.post("/batch", response_model=CalculatorBatchResult)
+async def api_batch(data: CalculatorBatchInput):
+    """Evaluate many future value / EMI / mortgage scenarios in one request.
+
+    Results are returned column-wise (one list per result field, in input order)
+    and are not written to calculator history.
+    """
+    result = CalculatorBatchResult(
+        count=len(data.future_value) + len(data.loan_emi) + len(data.mortgage)
+    )
+    if data.future_value:
+        result.future_value = calculate_future_value_batch(data.future_value)
+    if data.loan_emi:
+        result.loan_emi = calculate_loan_emi_batch(data.loan_emi)
+    if data.mortgage:
+        result.mortgage = calculate_mortgage_batch(data.mortgage)
+    return result
+
+
+@router.post("/amortization")
+async def api_amortization(data: AmortizationScheduleInput):
+    """Stream month-by-month amortization schedules as NDJSON or CSV"""
+    media_type = "text/csv" if data.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_amortization(data.loans, data.format), media_type=media_type)
@@ -1,10 +1,14 @@
+import json
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.schemas import ChatMessage, ChatResponse
 from app.services.rag import rag_service
 from app.services.auth import get_current_user
+from app.services.history import history_writer
 from app.models.user import User, ChatHistory
 
 router = APIRouter(prefix="/chat", tags=["AI Chat"])
@@ -13,7 +17,6 @@ router = APIRouter(prefix="/chat", tags=["AI Chat"])
 @router.post("/ask", response_model=ChatResponse)
 async def ask_question(
     message: ChatMessage,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Ask a financial question to the AI assistant"""
@@ -21,18 +24,60 @@ async def ask_question(
     
     # Save to history if user is logged in
     if current_user:
-        chat_history = ChatHistory(
+        await history_writer.add(
+            ChatHistory,
             user_id=current_user.id,
             session_id=result["session_id"],
             question=message.message,
             answer=result["answer"]
         )
-        db.add(chat_history)
-        await db.commit()
     
     return ChatResponse(**result)
 
 
+@router.post("/stream")
+async def stream_question(
+    message: ChatMessage,
+    current_user: User = Depends(get_current_user)
+):
+    """Ask a question and receive the answer as Server-Sent Events.
+
+    Each token arrives as `data: {"token": ...}`; the last event carries
+    `done`, `sources`, `session_id` and `error` (set when the answer was cut
+    off part-way; such answers are not saved to history).
+    """
+    async def event_stream():
+        async for event in rag_service.stream_answer(message.message, message.session_id):
+            if event.get("done"):
+                if current_user and event["error"] is None:
+                    await history_writer.add(
+                        ChatHistory,
+                        user_id=current_user.id,
+                        session_id=event["session_id"],
+                        question=message.message,
+                        answer=event["answer"]
+                    )
+                event = {
+                    "done": True,
+                    "sources": event["sources"],
+                    "session_id": event["session_id"],
+                    "error": event["error"]
+                }
+            yield f"data: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Answer cache size and hit/miss counters"""
+    return rag_service.answer_cache.stats()
+
+
 @router.get("/history")
 async def get_chat_history(
     session_id: str = None,
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.services.auth import get_current_user_required
 from app.services import portfolio as portfolio_service
+from app.services.timeseries import SYMBOL_PATTERN
 from app.models.user import User
 from app.schemas import (
     PortfolioHoldingCreate,
@@ -10,7 +13,13 @@ from app.schemas import (
     PortfolioHoldingResponse,
     WatchlistItemCreate,
     WatchlistItemResponse,
-    PortfolioSummary
+    WatchlistAlertResponse,
+    PortfolioSummary,
+    PortfolioSnapshot,
+    StockQuote,
+    PriceHistory,
+    PortfolioPerformance,
+    PortfolioRisk
 )
 
 router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
@@ -35,7 +44,7 @@ async def add_holding(
     new_holding = await portfolio_service.create_holding(db, current_user.id, holding)
     
     # Get the response with current price calculations
-    current_price = portfolio_service.get_current_price(new_holding.symbol)
+    current_price = await portfolio_service.get_current_price(new_holding.symbol)
     current_value = current_price * new_holding.quantity
     invested_value = new_holding.buy_price * new_holding.quantity
     gain_loss = current_value - invested_value
@@ -74,7 +83,7 @@ async def update_holding(
     
     updated = await portfolio_service.update_holding(db, holding, update_data)
     
-    current_price = portfolio_service.get_current_price(updated.symbol)
+    current_price = await portfolio_service.get_current_price(updated.symbol)
     current_value = current_price * updated.quantity
     invested_value = updated.buy_price * updated.quantity
     gain_loss = current_value - invested_value
@@ -121,12 +130,76 @@ async def get_portfolio_summary(
     return await portfolio_service.get_portfolio_summary(db, current_user.id)
 
 
+@router.get("/snapshot", response_model=PortfolioSnapshot)
+async def get_portfolio_snapshot(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_required)
+):
+    """Get holdings and summary together, loading and pricing holdings once"""
+    return await portfolio_service.get_portfolio_snapshot(db, current_user.id)
+
+
+@router.get("/performance", response_model=PortfolioPerformance)
+async def get_portfolio_performance(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_required)
+):
+    """Get daily portfolio value, time-weighted return and XIRR (returns in %)"""
+    return await portfolio_service.get_portfolio_performance(db, current_user.id)
+
+
+@router.get("/risk", response_model=PortfolioRisk)
+async def get_portfolio_risk(
+    window_days: int = Query(365, ge=30, le=3650, description="Lookback window in calendar days"),
+    confidence: float = Query(0.95, gt=0.5, lt=1, description="VaR confidence level"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_required)
+):
+    """Get volatility, correlation matrix, beta vs Nifty 50 and one-day VaR (volatility and weights in %)"""
+    return await portfolio_service.get_portfolio_risk(db, current_user.id, window_days, confidence)
+
+
 @router.get("/stocks", response_model=list[dict])
 async def get_stock_suggestions():
     """Get list of popular stocks for autocomplete"""
     return portfolio_service.get_stock_suggestions()
 
 
+@router.get("/quotes", response_model=list[StockQuote])
+async def get_quotes(
+    symbols: str = Query(..., description="Comma-separated stock symbols, e.g. TCS,INFY")
+):
+    """Get current prices for several symbols in one call"""
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not symbol_list or len(symbol_list) > 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide between 1 and 200 symbols"
+        )
+    invalid = [s for s in symbol_list if not SYMBOL_PATTERN.match(s.upper())]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid symbol: {invalid[0]}"
+        )
+    return await portfolio_service.get_stock_quotes(symbol_list)
+
+
+@router.get("/history/{symbol}", response_model=PriceHistory)
+async def get_price_history(
+    symbol: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """Get daily OHLCV price history for a symbol"""
+    if not SYMBOL_PATTERN.match(symbol.upper()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid symbol: {symbol}"
+        )
+    return portfolio_service.get_price_history(symbol, start, end)
+
+
 # Watchlist endpoints
 @router.get("/watchlist", response_model=list[WatchlistItemResponse])
 async def get_watchlist(
@@ -150,7 +223,7 @@ async def add_to_watchlist(
         symbol=new_item.symbol,
         company_name=new_item.company_name,
         target_price=new_item.target_price,
-        current_price=portfolio_service.get_current_price(new_item.symbol),
+        current_price=await portfolio_service.get_current_price(new_item.symbol),
         notes=new_item.notes
     )
 
@@ -169,3 +242,13 @@ async def remove_from_watchlist(
             detail="Watchlist item not found"
         )
     return None
+
+
+@router.get("/alerts", response_model=list[WatchlistAlertResponse])
+async def get_alerts(
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_required)
+):
+    """Get watchlist target-price alerts that have fired, newest first"""
+    return await portfolio_service.get_user_alerts(db, current_user.id, limit)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Literal, Optional
+from datetime import date, datetime
 
 
 # Auth Schemas
@@ -55,6 +55,17 @@ class SavingsPlanInput(BaseModel):
     years: int = Field(..., gt=0, description="Investment period in years")
 
 
+class GoalSimulationInput(BaseModel):
+    initial_savings: float = Field(..., ge=0, description="Initial savings amount")
+    annual_contribution: float = Field(..., ge=0, description="Yearly contribution, added at each year end")
+    expected_return: float = Field(..., ge=-50, le=100, description="Expected annual return (%)")
+    volatility: float = Field(default=15.0, ge=0, le=100, description="Annual return volatility (%)")
+    years: int = Field(..., gt=0, le=100, description="Investment period in years")
+    goal: Optional[float] = Field(default=None, gt=0, description="Target corpus")
+    paths: int = Field(default=10000, ge=1000, le=100000, description="Number of simulated paths")
+    seed: Optional[int] = Field(default=None, ge=0, description="Random seed for reproducible results")
+
+
 class MortgageInput(BaseModel):
     home_price: float = Field(..., gt=0, description="Property price")
     down_payment: float = Field(..., ge=0, description="Down payment amount")
@@ -75,6 +86,42 @@ class CalculatorResult(BaseModel):
     summary: str
 
 
+class CalculatorBatchInput(BaseModel):
+    future_value: list[FutureValueInput] = Field(default=[], max_length=10000)
+    loan_emi: list[LoanEMIInput] = Field(default=[], max_length=10000)
+    mortgage: list[MortgageInput] = Field(default=[], max_length=10000)
+
+
+class CalculatorBatchResult(BaseModel):
+    future_value: dict[str, list] = {}
+    loan_emi: dict[str, list] = {}
+    mortgage: dict[str, list] = {}
+    count: int
+
+
+class Prepayment(BaseModel):
+    month: int = Field(..., gt=0, description="Month the lump sum is paid, after that month's EMI")
+    amount: float = Field(..., gt=0, description="Prepayment amount")
+
+
+class RateReset(BaseModel):
+    month: int = Field(..., gt=0, description="First month charged at the new rate")
+    rate: float = Field(..., ge=0, le=100, description="New annual interest rate (%)")
+
+
+class AmortizationInput(BaseModel):
+    principal: float = Field(..., gt=0, description="Loan amount")
+    rate: float = Field(..., ge=0, le=100, description="Annual interest rate (%)")
+    tenure_months: int = Field(..., gt=0, description="Loan tenure in months")
+    prepayments: list[Prepayment] = []
+    rate_resets: list[RateReset] = []
+
+
+class AmortizationScheduleInput(BaseModel):
+    loans: list[AmortizationInput] = Field(..., min_length=1, max_length=10000)
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+
 # Chat Schemas
 class ChatMessage(BaseModel):
     message: str = Field(..., min_length=1, max_length=2000)
@@ -88,23 +135,44 @@ class ChatResponse(BaseModel):
 
 
 # Portfolio Schemas
+# Ticker symbols (matched case-insensitively; stored upper-cased), e.g. TCS, M&M, BAJAJ-AUTO
+SYMBOL_REGEX = r"^[A-Za-z0-9&-]{1,20}$"
+
+
+def _past_date(value: str) -> str:
+    """Validate an ISO date (YYYY-MM-DD) that is not in the future"""
+    if date.fromisoformat(value) > date.today():
+        raise ValueError("Purchase date cannot be in the future")
+    return value
+
+
 class PortfolioHoldingCreate(BaseModel):
-    symbol: str = Field(..., min_length=1, max_length=20, description="Stock symbol")
+    symbol: str = Field(..., pattern=SYMBOL_REGEX, description="Stock symbol")
     company_name: str = Field(..., min_length=1, max_length=255, description="Company name")
     quantity: float = Field(..., gt=0, description="Number of shares")
     buy_price: float = Field(..., gt=0, description="Purchase price per share")
     buy_date: str = Field(..., description="Purchase date (YYYY-MM-DD)")
     notes: Optional[str] = Field(None, max_length=500)
 
+    @field_validator("buy_date")
+    @classmethod
+    def check_buy_date(cls, value: str) -> str:
+        return _past_date(value)
+
 
 class PortfolioHoldingUpdate(BaseModel):
-    symbol: Optional[str] = Field(None, max_length=20)
+    symbol: Optional[str] = Field(None, pattern=SYMBOL_REGEX)
     company_name: Optional[str] = Field(None, max_length=255)
     quantity: Optional[float] = Field(None, gt=0)
     buy_price: Optional[float] = Field(None, gt=0)
     buy_date: Optional[str] = None
     notes: Optional[str] = Field(None, max_length=500)
 
+    @field_validator("buy_date")
+    @classmethod
+    def check_buy_date(cls, value: Optional[str]) -> Optional[str]:
+        return _past_date(value) if value else value
+
 
 class PortfolioHoldingResponse(BaseModel):
     id: int
@@ -125,7 +193,7 @@ class PortfolioHoldingResponse(BaseModel):
 
 
 class WatchlistItemCreate(BaseModel):
-    symbol: str = Field(..., min_length=1, max_length=20)
+    symbol: str = Field(..., pattern=SYMBOL_REGEX)
     company_name: str = Field(..., min_length=1, max_length=255)
     target_price: Optional[float] = Field(None, gt=0)
     notes: Optional[str] = Field(None, max_length=500)
@@ -143,6 +211,19 @@ class WatchlistItemResponse(BaseModel):
         from_attributes = True
 
 
+class WatchlistAlertResponse(BaseModel):
+    id: int
+    watchlist_id: int
+    symbol: str
+    target_price: float
+    trigger_price: float
+    direction: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class PortfolioSummary(BaseModel):
     total_invested: float
     current_value: float
@@ -151,3 +232,53 @@ class PortfolioSummary(BaseModel):
     holdings_count: int
     top_performer: Optional[str] = None
     worst_performer: Optional[str] = None
+
+
+class PortfolioSnapshot(BaseModel):
+    holdings: list[PortfolioHoldingResponse]
+    summary: PortfolioSummary
+
+
+class StockQuote(BaseModel):
+    symbol: str
+    name: Optional[str] = None
+    price: float
+
+
+class PriceHistory(BaseModel):
+    symbol: str
+    dates: list[str]
+    open: list[float]
+    high: list[float]
+    low: list[float]
+    close: list[float]
+    volume: list[int]
+
+
+class PortfolioPerformance(BaseModel):
+    dates: list[str] = []
+    values: list[float] = []
+    invested: list[float] = []
+    twr: Optional[float] = None
+    twr_annualized: Optional[float] = None
+    xirr: Optional[float] = None
+
+
+class HoldingRisk(BaseModel):
+    symbol: str
+    weight: float
+    volatility: float
+    beta: float
+
+
+class PortfolioRisk(BaseModel):
+    holdings: list[HoldingRisk] = []
+    correlation: list[list[float]] = []
+    portfolio_value: float = 0
+    volatility: Optional[float] = None
+    beta: Optional[float] = None
+    var_historical: Optional[float] = None
+    var_parametric: Optional[float] = None
+    confidence: float
+    window_days: int
+    benchmark: str
@@ -1,19 +1,27 @@
 from app.services.auth import (
     verify_password, get_password_hash, create_access_token,
-    get_user_by_email, get_user_by_username, create_user,
-    authenticate_user, get_current_user, get_current_user_required
+    get_user_by_email, get_user_by_username, get_user_by_username_or_email, create_user,
+    authenticate_user, get_current_user, get_current_user_required,
+    password_hasher, PasswordHasher, identity_cache, IdentityCache
 )
 from app.services.calculator import (
     calculate_future_value, calculate_loan_emi, calculate_savings_plan,
-    calculate_mortgage, calculate_investment_return
+    calculate_mortgage, calculate_investment_return,
+    calculate_future_value_batch, calculate_loan_emi_batch, calculate_mortgage_batch,
+    amortization_schedule, stream_amortization, simulate_savings_goal
 )
 from app.services.rag import rag_service, RAGService
+from app.services.history import history_writer, HistoryWriter
 
 __all__ = [
     "verify_password", "get_password_hash", "create_access_token",
-    "get_user_by_email", "get_user_by_username", "create_user",
+    "get_user_by_email", "get_user_by_username", "get_user_by_username_or_email", "create_user",
     "authenticate_user", "get_current_user", "get_current_user_required",
+    "password_hasher", "PasswordHasher", "identity_cache", "IdentityCache",
     "calculate_future_value", "calculate_loan_emi", "calculate_savings_plan",
     "calculate_mortgage", "calculate_investment_return",
-    "rag_service", "RAGService"
+    "calculate_future_value_batch", "calculate_loan_emi_batch", "calculate_mortgage_batch",
+    "amortization_schedule", "stream_amortization", "simulate_savings_goal",
+    "rag_service", "RAGService",
+    "history_writer", "HistoryWriter"
 ]
@@ -0,0 +1,203 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.portfolio import StockWatchlist, WatchlistAlert
+from app.services.prices import QuoteCache, price_cache
+
+
+class FiredAlert(NamedTuple):
+    watchlist_id: int
+    user_id: int
+    symbol: str
+    target_price: float
+    trigger_price: float
+    direction: str
+
+
+class SymbolTargets:
+    """Active targets for one symbol, sorted by price (parallel lists kept in step)"""
+
+    def __init__(self):
+        self.prices: list[float] = []
+        self.ids: list[int] = []
+
+    def add(self, price: float, item_id: int):
+        index = bisect_right(self.prices, price)
+        self.prices.insert(index, price)
+        self.ids.insert(index, item_id)
+
+    def remove(self, price: float, item_id: int):
+        index = bisect_left(self.prices, price)
+        while index < len(self.prices) and self.prices[index] == price:
+            if self.ids[index] == item_id:
+                del self.prices[index], self.ids[index]
+                return
+            index += 1
+
+    def pop_crossed(self, previous: float, current: float) -> list[tuple[float, int]]:
+        """Remove and return targets in (previous, current] when rising or [current, previous) when falling"""
+        if current > previous:
+            lo, hi = bisect_right(self.prices, previous), bisect_right(self.prices, current)
+        else:
+            lo, hi = bisect_left(self.prices, current), bisect_left(self.prices, previous)
+        crossed = list(zip(self.prices[lo:hi], self.ids[lo:hi]))
+        del self.prices[lo:hi], self.ids[lo:hi]
+        return crossed
+
+
+class AlertEngine:
+    """Fires watchlist target-price alerts as prices move.
+
+    Active targets are kept per symbol in sorted order, so each price tick
+    finds the targets it crossed by bisecting between the previous and the
+    new price instead of scanning watchlists. A target fires once; fired
+    alerts are written straight to the database and kept for the next tick
+    if the write fails. The first price seen for a symbol only sets its
+    reference point.
+
+    Targets are reloaded from the database every `reload_every` ticks, so
+    watchlist changes made through other workers are picked up. add() and
+    remove() only apply while the engine is running.
+    """
+
+    def __init__(self, quotes: QuoteCache, interval: float, reload_every: int = 4):
+        self.quotes = quotes
+        self.interval = interval
+        self.reload_every = reload_every
+        self._targets: dict[str, SymbolTargets] = defaultdict(SymbolTargets)
+        self._items: dict[int, tuple[str, float, int]] = {}  # watchlist id -> (symbol, target, user_id)
+        self._last_prices: dict[str, float] = {}
+        self._unsaved: list[FiredAlert] = []
+        self._ticks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, db: AsyncSession):
+        """Load every watchlist target that has not fired yet"""
+        result = await db.execute(
+            select(
+                StockWatchlist.id,
+                StockWatchlist.user_id,
+                StockWatchlist.symbol,
+                StockWatchlist.target_price
+            )
+            .outerjoin(WatchlistAlert, and_(
+                WatchlistAlert.watchlist_id == StockWatchlist.id,
+                WatchlistAlert.target_price == StockWatchlist.target_price
+            ))
+            .where(StockWatchlist.target_price.is_not(None), WatchlistAlert.id.is_(None))
+        )
+        unsaved = {alert.watchlist_id for alert in self._unsaved}
+        by_symbol = defaultdict(list)
+        self._items.clear()
+        for item_id, user_id, symbol, target in result:
+            if item_id in unsaved:
+                continue
+            symbol = symbol.upper()
+            by_symbol[symbol].append((target, item_id))
+            self._items[item_id] = (symbol, target, user_id)
+        self._targets.clear()
+        for symbol, targets in by_symbol.items():
+            targets.sort()
+            entry = self._targets[symbol]
+            entry.prices = [price for price, _ in targets]
+            entry.ids = [item_id for _, item_id in targets]
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def add(self, item_id: int, user_id: int, symbol: str, target: Optional[float]):
+        """Track a watchlist item's target, replacing any previous target for it"""
+        if not self.running:
+            return
+        self._untrack(item_id)
+        if target is None:
+            return
+        symbol = symbol.upper()
+        self._targets[symbol].add(target, item_id)
+        self._items[item_id] = (symbol, target, user_id)
+
+    def remove(self, item_id: int):
+        """Stop tracking a deleted watchlist item"""
+        if not self.running:
+            return
+        self._untrack(item_id)
+        # The watchlist row is gone, so an alert for it can no longer be saved
+        self._unsaved = [alert for alert in self._unsaved if alert.watchlist_id != item_id]
+
+    def _untrack(self, item_id: int):
+        item = self._items.pop(item_id, None)
+        if item is not None:
+            symbol, target, _ = item
+            self._targets[symbol].remove(target, item_id)
+
+    def symbols(self) -> list[str]:
+        return [symbol for symbol, entry in self._targets.items() if entry.prices]
+
+    def evaluate(self, prices: dict[str, float]) -> list[FiredAlert]:
+        """Apply one tick of prices and return the alerts it fired"""
+        fired = []
+        for symbol, price in prices.items():
+            previous = self._last_prices.get(symbol)
+            self._last_prices[symbol] = price
+            entry = self._targets.get(symbol)
+            if previous is None or previous == price or entry is None:
+                continue
+            direction = "above" if price > previous else "below"
+            for target, item_id in entry.pop_crossed(previous, price):
+                _, _, user_id = self._items.pop(item_id)
+                fired.append(FiredAlert(item_id, user_id, symbol, target, price, direction))
+        return fired
+
+    async def start(self):
+        async with async_session() as db:
+            await self.load(db)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def check(self):
+        """One tick: periodically reload targets, fetch prices, then record fired alerts"""
+        self._ticks += 1
+        if self._ticks % self.reload_every == 0:
+            async with async_session() as db:
+                await self.load(db)
+        symbols = self.symbols()
+        if symbols:
+            self._unsaved.extend(self.evaluate(await self.quotes.get_many(symbols)))
+        if self._unsaved:
+            async with async_session() as db:
+                db.add_all(WatchlistAlert(**alert._asdict()) for alert in self._unsaved)
+                await db.commit()
+            self._unsaved = []
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Alert check error: {e} ({len(self._unsaved)} fired alerts not yet saved)")
+
+
+# Global alert engine, started from the app lifespan when alerts are enabled
+alert_engine = AlertEngine(
+    price_cache,
+    interval=settings.alert_check_interval,
+    reload_every=settings.alert_reload_every
+)
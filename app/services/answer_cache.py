@@ -0,0 +1,101 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace"""
+    return " ".join(re.findall(r"[a-z0-9₹]+", question.lower()))
+
+
+class AnswerCache:
+    """LRU + TTL cache of answers keyed on normalized question text.
+
+    On an exact miss, the question embedding is compared against every cached
+    question (one matrix-vector product) and the closest entry is reused when
+    its cosine similarity reaches `similarity_threshold`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embedder = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._keys: list[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def get(self, question: str, vector: Optional[np.ndarray] = None) -> Optional[dict]:
+        """Return {"answer", "sources"} for a cached equivalent question, or None.
+
+        Pass the question's embedding as `vector` when the caller already has it;
+        otherwise it is computed here on an exact-key miss.
+        """
+        key = normalize_question(question)
+        entry = self._entries.get(key)
+        if entry is None and self.embedder is not None and self._entries:
+            key, entry = self._nearest(question, vector)
+        if entry is not None and entry["expires"] < time.monotonic():
+            self._evict(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return {"answer": entry["answer"], "sources": entry["sources"]}
+
+    def put(self, question: str, answer: str, sources: list[str], vector: Optional[np.ndarray] = None):
+        key = normalize_question(question)
+        if vector is None and self.embedder is not None:
+            vector = self.embedder.embed([question])[0]
+        self._entries[key] = {
+            "answer": answer,
+            "sources": sources,
+            "vector": vector,
+            "expires": time.monotonic() + self.ttl_seconds
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def clear(self):
+        self._entries.clear()
+        self._matrix = None
+
+    def _evict(self, key: str):
+        self._entries.pop(key, None)
+        self._matrix = None
+
+    def _nearest(self, question: str, vector: Optional[np.ndarray] = None) -> tuple[Optional[str], Optional[dict]]:
+        if self._matrix is None:
+            self._keys = [k for k, e in self._entries.items() if e["vector"] is not None]
+            if not self._keys:
+                return None, None
+            self._matrix = np.stack([self._entries[k]["vector"] for k in self._keys])
+        if vector is None:
+            vector = self.embedder.embed([question])[0]
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None, None
+        key = self._keys[best]
+        return key, self._entries[key]
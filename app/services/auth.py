@@ -1,9 +1,13 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -25,6 +29,133 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so `max_workers` threads hash in
+    parallel while the loop keeps serving other requests. Callers beyond
+    the worker count wait their turn; once `max_queue` are already waiting,
+    new requests are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly"
+            )
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue
+)
+
+
+class IdentityCache:
+    """LRU + TTL cache of resolved users keyed on access token.
+
+    An entry lives for `ttl_seconds` or until the token expires, whichever
+    comes first. Anything that changes a user must call `invalidate_user`
+    so cached copies are dropped for every token of that user.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[User, float]] = OrderedDict()
+        self._tokens_by_user: dict[str, set[str]] = {}
+
+    def get(self, token: str) -> Optional[User]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            self.invalidate_token(token)
+            return None
+        self._entries.move_to_end(token)
+        return entry[0]
+
+    def put(self, token: str, user: User, token_expires: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl_seconds
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+        self.invalidate_token(token)
+        self._entries[token] = (user, expires)
+        self._tokens_by_user.setdefault(user.username, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self.invalidate_token(next(iter(self._entries)))
+
+    def invalidate_token(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].username)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].username]
+
+    def invalidate_user(self, username: str):
+        for token in self._tokens_by_user.pop(username, set()):
+            self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+
+identity_cache = IdentityCache(
+    max_entries=settings.identity_cache_size,
+    ttl_seconds=settings.identity_cache_ttl
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -46,8 +177,19 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     return result.scalar_one_or_none()
 
 
+async def get_user_by_username_or_email(db: AsyncSession, identifier: str) -> Optional[User]:
+    """One query over both unique indexes; a username match wins over an email match"""
+    result = await db.execute(
+        select(User)
+        .where(or_(User.username == identifier, User.email == identifier))
+        .order_by((User.username == identifier).desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
 async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -58,16 +200,15 @@ async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    identity_cache.invalidate_user(db_user.username)
     return db_user
 
 
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
-    user = await get_user_by_username(db, username)
-    if not user:
-        user = await get_user_by_email(db, username)
+    user = await get_user_by_username_or_email(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
 
@@ -87,6 +228,10 @@ async def get_current_user(
     if not token:
         return None
     
+    cached = identity_cache.get(token)
+    if cached is not None:
+        return cached
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
@@ -96,6 +241,8 @@ async def get_current_user(
         return None
     
     user = await get_user_by_username(db, username)
+    if user is not None:
+        identity_cache.put(token, user, payload.get("exp"))
     return user
 
 
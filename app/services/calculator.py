@@ -1,8 +1,40 @@
+import json
+import secrets
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.config import settings
 from app.schemas import (
     FutureValueInput, LoanEMIInput, SavingsPlanInput,
-    MortgageInput, InvestmentReturnInput, CalculatorResult
+    MortgageInput, InvestmentReturnInput, CalculatorResult,
+    AmortizationInput, GoalSimulationInput
 )
 
+SCHEDULE_COLUMNS = ["month", "payment", "principal", "interest", "prepayment", "balance"]
+SIMULATION_PERCENTILES = [10, 25, 50, 75, 90]
+SIMULATION_CHUNK_PATHS = 25000
+
+_simulation_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _column(rows: list, field: str) -> np.ndarray:
+    """Pull one field out of a list of inputs as a float array"""
+    return np.fromiter((getattr(row, field) for row in rows), dtype=float, count=len(rows))
+
+
+def _annuity_payment(principal: np.ndarray, monthly_rate: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Vectorized EMI formula, falling back to P / n where the rate is zero"""
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate == 0, principal / months, payment)
+
+
+def _rounded(values: np.ndarray) -> list[float]:
+    return np.round(values, 2).tolist()
+
 
 def calculate_future_value(data: FutureValueInput) -> CalculatorResult:
     """Calculate future value with compound interest: A = P(1 + r/n)^(nt)"""
@@ -91,6 +123,105 @@ def calculate_savings_plan(data: SavingsPlanInput) -> CalculatorResult:
     return CalculatorResult(result=result, summary=summary)
 
 
+def _simulate_paths(
+    seed: np.random.SeedSequence,
+    paths: int,
+    years: int,
+    initial: float,
+    annual: float,
+    mu: float,
+    sigma: float
+) -> np.ndarray:
+    """Portfolio value at each year end (row 0 = start) for a block of paths.
+
+    Yearly growth factors are lognormal. With G_t the cumulative growth to
+    year t, the value is V_t = G_t * (initial + annual * sum_{k<=t} 1 / G_k),
+    so the whole years x paths grid is computed without a Python loop. Rows
+    are years so the per-year percentiles later read contiguous memory.
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.exp(rng.normal(mu, sigma, (years, paths)))
+    np.cumprod(growth, axis=0, out=growth)
+    values = np.empty((years + 1, paths))
+    values[0] = initial
+    values[1:] = growth * (initial + annual * np.cumsum(1 / growth, axis=0))
+    return values
+
+
+def simulation_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for Monte Carlo chunks, or None to simulate in-process"""
+    global _simulation_pool
+    if _simulation_pool is None and settings.monte_carlo_workers > 0:
+        _simulation_pool = ProcessPoolExecutor(max_workers=settings.monte_carlo_workers)
+    return _simulation_pool
+
+
+def shutdown_simulation_pool():
+    global _simulation_pool
+    if _simulation_pool is not None:
+        _simulation_pool.shutdown(cancel_futures=True)
+        _simulation_pool = None
+
+
+def simulate_savings_goal(data: GoalSimulationInput, executor: Optional[Executor] = None) -> CalculatorResult:
+    """Monte Carlo savings growth with stochastic annual returns and yearly contributions.
+
+    Paths are split into fixed-size chunks, each with its own child seed, so a
+    given seed gives the same result whether chunks run in-process or on an
+    executor.
+    """
+    r = data.expected_return / 100
+    s = data.volatility / 100
+    # Lognormal parameters matching the arithmetic mean and volatility of yearly returns
+    sigma = np.sqrt(np.log(1 + (s / (1 + r)) ** 2))
+    mu = np.log(1 + r) - sigma ** 2 / 2
+
+    seed_value = data.seed if data.seed is not None else secrets.randbits(32)
+    seed = np.random.SeedSequence(seed_value)
+    sizes = [SIMULATION_CHUNK_PATHS] * (data.paths // SIMULATION_CHUNK_PATHS)
+    if data.paths % SIMULATION_CHUNK_PATHS:
+        sizes.append(data.paths % SIMULATION_CHUNK_PATHS)
+    n = len(sizes)
+    args = (seed.spawn(n), sizes, [data.years] * n, [data.initial_savings] * n,
+            [data.annual_contribution] * n, [mu] * n, [sigma] * n)
+    chunks = executor.map(_simulate_paths, *args) if executor else map(_simulate_paths, *args)
+    values = np.concatenate(list(chunks), axis=1)
+
+    bands = np.percentile(values, SIMULATION_PERCENTILES, axis=1)
+    final = values[-1]
+    total_contributions = data.initial_savings + data.annual_contribution * data.years
+    # Same inputs at a fixed rate, as calculate_savings_plan would compute them
+    growth = (1 + r) ** data.years
+    deterministic = data.initial_savings * growth + (
+        data.annual_contribution * data.years if r == 0 else data.annual_contribution * (growth - 1) / r
+    )
+    probability = float(np.mean(final >= data.goal)) if data.goal is not None else None
+
+    result = {
+        "years": list(range(data.years + 1)),
+        "percentiles": {f"p{p}": _rounded(band) for p, band in zip(SIMULATION_PERCENTILES, bands)},
+        "median_final_value": round(float(np.median(final)), 2),
+        "mean_final_value": round(float(final.mean()), 2),
+        "total_contributions": round(total_contributions, 2),
+        "deterministic_future_value": round(deterministic, 2),
+        "goal": data.goal,
+        "probability_of_goal": round(probability * 100, 2) if probability is not None else None,
+        "paths": data.paths,
+        "seed": seed_value
+    }
+
+    median = result["median_final_value"]
+    summary = (
+        f"Across {data.paths:,} simulated markets ({data.expected_return}% expected return, {data.volatility}% volatility), "
+        f"saving ₹{data.annual_contribution:,.2f} a year on top of ₹{data.initial_savings:,.2f} gives a median of ₹{median:,.2f} "
+        f"after {data.years} years (10th-90th percentile: ₹{bands[0, -1]:,.2f} to ₹{bands[-1, -1]:,.2f})."
+    )
+    if probability is not None:
+        summary += f" Chance of reaching ₹{data.goal:,.2f}: {probability * 100:.1f}%"
+
+    return CalculatorResult(result=result, summary=summary)
+
+
 def calculate_mortgage(data: MortgageInput) -> CalculatorResult:
     """Calculate mortgage with taxes and insurance"""
     home_price = data.home_price
@@ -161,3 +292,182 @@ def calculate_investment_return(data: InvestmentReturnInput) -> CalculatorResult
     summary = f"An investment of ₹{P:,.2f} at {data.rate}% annual return for {years} years will grow to ₹{future_value:,.2f}. Total return: ₹{total_return:,.2f} ({(total_return/P)*100:.1f}%)"
     
     return CalculatorResult(result=result, summary=summary)
+
+
+# Batch calculators - evaluate whole what-if grids as array operations
+
+def calculate_future_value_batch(rows: list[FutureValueInput]) -> dict[str, list]:
+    """Vectorized calculate_future_value over many inputs, returned column-wise"""
+    P = _column(rows, "principal")
+    rate = _column(rows, "rate")
+    n = _column(rows, "compounds_per_year")
+    t = _column(rows, "time")
+
+    future_value = P * (1 + rate / 100 / n) ** (n * t)
+    total_interest = future_value - P
+
+    return {
+        "principal": _rounded(P),
+        "future_value": _rounded(future_value),
+        "total_interest": _rounded(total_interest),
+        "rate": rate.tolist(),
+        "time_years": t.tolist(),
+        "compounds_per_year": n.astype(int).tolist()
+    }
+
+
+def calculate_loan_emi_batch(rows: list[LoanEMIInput]) -> dict[str, list]:
+    """Vectorized calculate_loan_emi over many inputs, returned column-wise"""
+    P = _column(rows, "principal")
+    rate = _column(rows, "rate")
+    n = _column(rows, "tenure_months")
+
+    emi = _annuity_payment(P, rate / 100 / 12, n)
+    total_payment = emi * n
+    total_interest = total_payment - P
+
+    return {
+        "loan_amount": _rounded(P),
+        "monthly_emi": _rounded(emi),
+        "total_payment": _rounded(total_payment),
+        "total_interest": _rounded(total_interest),
+        "rate": rate.tolist(),
+        "tenure_months": n.astype(int).tolist()
+    }
+
+
+def calculate_mortgage_batch(rows: list[MortgageInput]) -> dict[str, list]:
+    """Vectorized calculate_mortgage over many inputs, returned column-wise"""
+    home_price = _column(rows, "home_price")
+    down_payment = _column(rows, "down_payment")
+    rate = _column(rows, "rate")
+    tenure_years = _column(rows, "tenure_years")
+    loan_amount = home_price - down_payment
+    n = tenure_years * 12
+
+    monthly_pi = _annuity_payment(loan_amount, rate / 100 / 12, n)
+    monthly_tax = (home_price * _column(rows, "property_tax_rate") / 100) / 12
+    monthly_insurance = (home_price * _column(rows, "insurance_rate") / 100) / 12
+
+    total_monthly = monthly_pi + monthly_tax + monthly_insurance
+    total_interest = monthly_pi * n - loan_amount
+
+    return {
+        "home_price": _rounded(home_price),
+        "down_payment": _rounded(down_payment),
+        "loan_amount": _rounded(loan_amount),
+        "monthly_principal_interest": _rounded(monthly_pi),
+        "monthly_tax": _rounded(monthly_tax),
+        "monthly_insurance": _rounded(monthly_insurance),
+        "total_monthly_payment": _rounded(total_monthly),
+        "total_interest": _rounded(total_interest),
+        "rate": rate.tolist(),
+        "tenure_years": tenure_years.astype(int).tolist()
+    }
+
+
+# Amortization schedules - generated segment by segment so they can be streamed
+
+def _remaining_months(balance: float, monthly_rate: float, emi: float) -> int:
+    """Whole months an EMI needs to clear a balance: n = -ln(1 - B*r/EMI) / ln(1 + r)"""
+    if monthly_rate == 0:
+        months = balance / emi
+    else:
+        months = -np.log(1 - balance * monthly_rate / emi) / np.log(1 + monthly_rate)
+    # Tolerance so a balance that is exactly k EMIs' worth is not rounded up to k + 1
+    return max(int(np.ceil(months - 1e-6)), 1)
+
+
+def amortization_schedule(data: AmortizationInput) -> Iterator[dict[str, np.ndarray]]:
+    """Yield the month-by-month schedule of a loan as column arrays.
+
+    The schedule is split into segments at every prepayment or rate reset. Within a
+    segment the rate and EMI are constant, so balances follow the closed form
+    B_k = B_0(1+r)^k - EMI((1+r)^k - 1)/r and are computed for the whole segment at once.
+    A prepayment keeps the EMI and shortens the tenure; a rate reset re-prices the EMI
+    over the months the current EMI still had to run, so earlier prepayments keep
+    their shortened tenure.
+    """
+    n = data.tenure_months
+    prepayments: dict[int, float] = {}
+    for p in data.prepayments:
+        if p.month <= n:
+            prepayments[p.month] = prepayments.get(p.month, 0.0) + p.amount
+    resets = {r.month: r.rate for r in data.rate_resets if r.month <= n}
+    breaks = sorted({m for m in prepayments} | {m - 1 for m in resets if m > 1} | {n})
+
+    balance = data.principal
+    r = resets.get(1, data.rate) / 100 / 12  # A reset in month 1 replaces the starting rate
+    emi = None
+    month = 0
+
+    for end in breaks:
+        if end <= month:
+            continue
+        if emi is None:
+            emi = float(_annuity_payment(np.float64(balance), np.float64(r), np.float64(n - month)))
+        elif month + 1 in resets:
+            remaining = _remaining_months(balance, r, emi)
+            r = resets[month + 1] / 100 / 12
+            emi = float(_annuity_payment(np.float64(balance), np.float64(r), np.float64(remaining)))
+
+        k = np.arange(1, end - month + 1, dtype=float)
+        if r == 0:
+            closing = balance - emi * k
+        else:
+            growth = (1 + r) ** k
+            closing = balance * growth - emi * (growth - 1) / r
+        opening = np.concatenate(([balance], closing[:-1]))
+        interest = opening * r
+        principal = np.full_like(k, emi) - interest
+
+        # Stop at the month the loan is paid off (rounding or after a prepayment)
+        paid_off = np.flatnonzero(closing <= 0.005)
+        if paid_off.size:
+            last = paid_off[0]
+            k, opening, interest, principal, closing = (
+                a[:last + 1] for a in (k, opening, interest, principal, closing)
+            )
+            principal[-1] = opening[-1]
+            closing[-1] = 0.0
+
+        prepayment = np.zeros_like(k)
+        if not paid_off.size and end in prepayments:
+            prepayment[-1] = min(prepayments[end], closing[-1])
+            closing[-1] -= prepayment[-1]
+
+        yield {
+            "month": (month + k).astype(int),
+            "payment": principal + interest,
+            "principal": principal,
+            "interest": interest,
+            "prepayment": prepayment,
+            "balance": closing
+        }
+
+        month = end
+        balance = float(closing[-1])
+        if balance <= 0.005:
+            return
+
+
+def stream_amortization(loans: list[AmortizationInput], fmt: str = "ndjson") -> Iterator[str]:
+    """Serialize amortization schedules for one or more loans as NDJSON or CSV lines"""
+    if fmt == "csv":
+        yield ",".join(["loan"] + SCHEDULE_COLUMNS) + "\n"
+
+    for index, loan in enumerate(loans):
+        for segment in amortization_schedule(loan):
+            months = segment["month"].tolist()
+            values = [_rounded(segment[col]) for col in SCHEDULE_COLUMNS[1:]]
+            rows = zip(months, *values)
+            if fmt == "csv":
+                yield "".join(
+                    f"{index},{month},{payment},{principal},{interest},{prepayment},{balance}\n"
+                    for month, payment, principal, interest, prepayment, balance in rows
+                )
+            else:
+                yield "".join(
+                    json.dumps({"loan": index, **dict(zip(SCHEDULE_COLUMNS, row))}) + "\n"
+                    for row in rows
+                )
@@ -0,0 +1,101 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import async_session
+
+
+class HistoryWriter:
+    """Write-behind buffer for history rows (chat and calculator).
+
+    Requests enqueue rows and return immediately; a background task drains the
+    queue and writes each table's rows with a single executemany INSERT once
+    `batch_size` rows are pending or `flush_interval` seconds have passed.
+    The queue is bounded, so producers wait when the writer falls behind.
+    A failed batch is retried once and then dropped with an error message.
+    """
+
+    def __init__(self, max_pending: int, batch_size: int, flush_interval: float, retry_delay: float = 0.5):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop the background task"""
+        if self._task is None:
+            return
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+        self.queue = None
+
+    async def add(self, model, **values):
+        """Queue a row for `model`; waits while the buffer is full"""
+        values.setdefault("created_at", datetime.utcnow())
+        if self.queue is None:
+            # Writer not running (e.g. scripts without the app lifespan): write through
+            await self._flush([(model, values)])
+            return
+        await self.queue.put((model, values))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    await self._flush(batch)
+                    return
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        """Insert a batch, retrying once before giving up on it"""
+        if not batch:
+            return
+        by_model = defaultdict(list)
+        for model, values in batch:
+            by_model[model].append(values)
+        for attempt in range(2):
+            try:
+                async with async_session() as session:
+                    for model, rows in by_model.items():
+                        await session.execute(insert(model), rows)
+                    await session.commit()
+                return
+            except Exception as e:
+                error = e
+                if attempt == 0:
+                    await asyncio.sleep(self.retry_delay)
+        counts = ", ".join(f"{model.__tablename__}: {len(rows)}" for model, rows in by_model.items())
+        print(f"❌ History write failed after retry, rows dropped ({counts}): {error}")
+
+
+# Global history writer instance
+history_writer = HistoryWriter(
+    max_pending=settings.history_max_pending,
+    batch_size=settings.history_batch_size,
+    flush_interval=settings.history_flush_interval
+)
@@ -0,0 +1,76 @@
+import re
+from collections import defaultdict
+from typing import Optional
+
+from app.services.knowledge import STOPWORDS, chunk_markdown
+
+# Words too generic to identify a knowledge-base section on their own
+GENERIC_WORDS = frozenset(
+    "step types common explained investing investment investments india up lakh avoid".split()
+)
+
+
+class IntentRouter:
+    """Keyword intent matcher compiled into a single alternation regex.
+
+    Each intent is {"name", "keywords", "answer", "weight"}. One regex scan of
+    the question finds every keyword occurrence; each match adds the intent's
+    weight to its score and the highest-scoring intent wins (ties go to the
+    intent listed first).
+    """
+
+    def __init__(self, intents: list[dict]):
+        self.intents = intents
+        self._keyword_intents: dict[str, list[int]] = defaultdict(list)
+        for index, intent in enumerate(intents):
+            for keyword in intent["keywords"]:
+                self._keyword_intents[keyword.lower()].append(index)
+        # Longest keywords first so multi-word phrases win over their prefixes
+        alternation = "|".join(
+            re.escape(k) for k in sorted(self._keyword_intents, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+    def scores(self, question: str) -> dict[int, float]:
+        scores: dict[int, float] = defaultdict(float)
+        for match in self._pattern.finditer(question):
+            for index in self._keyword_intents[match.group(0).lower()]:
+                scores[index] += self.intents[index]["weight"]
+        return scores
+
+    def route(self, question: str) -> Optional[dict]:
+        """Best-scoring intent for the question, or None if no keyword matched"""
+        scores = self.scores(question)
+        if not scores:
+            return None
+        best = min(scores, key=lambda index: (-scores[index], index))
+        return self.intents[best]
+
+
+def knowledge_intents(text: str, weight: float = 1.0) -> list[dict]:
+    """One intent per knowledge-base section, keyed on the words of its heading.
+
+    The weight is split across the heading's keywords, so a section scores at
+    most `weight` when the question mentions each of them once, however long
+    the heading is.
+    """
+    intents = []
+    seen = set()
+    for chunk in chunk_markdown(text):
+        title, _, body = chunk.partition("\n")
+        heading = title.split(" > ")[-1]
+        if heading in seen:
+            continue
+        seen.add(heading)
+        keywords = {
+            word for word in re.findall(r"[a-z0-9]+", heading.lower())
+            if word not in STOPWORDS and word not in GENERIC_WORDS and not word.isdigit()
+        }
+        if keywords:
+            intents.append({
+                "name": heading,
+                "keywords": sorted(keywords),
+                "answer": f"**{heading}**\n{body.strip()}",
+                "weight": weight / len(keywords)
+            })
+    return intents
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+
+
+def chunk_markdown(text: str, max_chars: int = 800) -> list[str]:
+    """Split markdown into section chunks, each prefixed with its heading path"""
+    chunks = []
+    headings: list[str] = []
+    body: list[str] = []
+
+    def flush():
+        content = "\n".join(body).strip()
+        if content:
+            title = " > ".join(headings)
+            for start in range(0, len(content), max_chars):
+                piece = content[start:start + max_chars]
+                chunks.append(f"{title}\n{piece}" if title else piece)
+        body.clear()
+
+    for line in text.splitlines():
+        match = re.match(r"^(#{1,6})\s+(.*)", line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            headings[:] = headings[:level - 1] + [match.group(2).strip()]
+        else:
+            body.append(line)
+    flush()
+    return chunks
+
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "should the to what when where which who why will with you your".split()
+)
+
+
+class HashingEmbedder:
+    """Dependency-free embedding: hashed unigrams and bigrams, L2-normalized"""
+
+    name = "hashing-512"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _bucket(self, token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little") % self.dim
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS]
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                vectors[row, self._bucket(token)] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Embeddings from a sentence-transformers model"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder():
+    """Use sentence-transformers when configured and installed, otherwise hashed bag-of-words"""
+    if settings.embedding_backend == "sentence-transformers":
+        try:
+            return SentenceTransformerEmbedder(settings.embedding_model)
+        except Exception as e:
+            print(f"⚠️ sentence-transformers unavailable ({e}). Using hashing embeddings.")
+    return HashingEmbedder()
+
+
+class KnowledgeIndex:
+    """Chunked vector index persisted as a NumPy matrix plus a JSON chunk list.
+
+    The embedding matrix is memory-mapped on load, and a query costs one
+    matrix-vector product followed by a top-k partial sort.
+    """
+
+    def __init__(self, path: str, embedder=None):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.chunks: list[str] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.embeddings is not None and len(self.chunks) > 0
+
+    def load_or_build(self, base_text: str):
+        """Load the persisted index, rebuilding it if the base text or embedder changed"""
+        if self.embedder is None:
+            self.embedder = create_embedder()
+        fingerprint = hashlib.sha256(base_text.encode()).hexdigest()
+        meta_path = self.path / "chunks.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("embedder") == self.embedder.name and meta.get("fingerprint") == fingerprint:
+                self.chunks = meta["chunks"]
+                self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode="r")
+                self._fingerprint = fingerprint
+                return
+        self._fingerprint = fingerprint
+        self.chunks = []
+        self.embeddings = None
+        self.add(chunk_markdown(base_text))
+
+    def add(self, chunks: list[str]):
+        """Embed and append chunks, then persist the index"""
+        if not chunks:
+            return
+        vectors = self.embedder.embed(chunks)
+        if self.embeddings is not None:
+            vectors = np.concatenate([np.asarray(self.embeddings), vectors])
+        self.chunks = self.chunks + chunks
+        self._save(vectors)
+
+    def _save(self, vectors: np.ndarray):
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.save(self.path / "embeddings.npy", vectors)
+        (self.path / "chunks.json").write_text(json.dumps({
+            "embedder": self.embedder.name,
+            "fingerprint": self._fingerprint,
+            "chunks": self.chunks
+        }), encoding="utf-8")
+        self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode="r")
+
+    def search(self, query: str, k: int = 4, vector: Optional[np.ndarray] = None) -> list[str]:
+        """Return the k chunks most similar to the query (or its precomputed embedding), best first"""
+        if not self.ready:
+            return []
+        if vector is None:
+            vector = self.embedder.embed([query])[0]
+        scores = self.embeddings @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [self.chunks[i] for i in top[np.argsort(-scores[top])]]
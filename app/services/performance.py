@@ -0,0 +1,93 @@
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from app.services.timeseries import PriceHistoryStore
+
+
+def xirr(amounts: np.ndarray, days: np.ndarray, guess: float = 0.1, max_iter: int = 100) -> Optional[float]:
+    """Annualized internal rate of return for cash flows at day offsets (Newton's method).
+
+    Flows follow the investor's view: purchases negative, final value positive.
+    Returns None if the iteration does not converge.
+    """
+    years = (days - days.min()) / 365.0
+    rate = guess
+    for _ in range(max_iter):
+        if rate <= -1:
+            rate = -0.99
+        discount = (1 + rate) ** -years
+        value = np.sum(amounts * discount)
+        derivative = np.sum(-years * amounts * discount / (1 + rate))
+        if derivative == 0:
+            return None
+        step = value / derivative
+        rate -= step
+        if abs(step) < 1e-10:
+            return float(rate)
+    return None
+
+
+def compute_performance(
+    store: PriceHistoryStore,
+    symbols: np.ndarray,
+    quantities: np.ndarray,
+    buy_prices: np.ndarray,
+    buy_dates: np.ndarray
+) -> Optional[dict]:
+    """Daily value series, time-weighted return and XIRR for a set of buy lots.
+
+    Lots are bucketed onto the trading calendar (purchases on non-trading days
+    count from the next session), per-symbol share counts are a cumulative sum
+    of those buckets, and the daily value is the row-wise dot product of shares
+    and closes. Each purchase is an external cash flow of quantity * buy_price.
+    Returns None when no lot falls on or before the latest session.
+    """
+    buy_dates = buy_dates.astype("datetime64[D]")
+    universe, symbol_index = np.unique(symbols, return_inverse=True)
+    start = buy_dates.min().astype(date)
+    dates, closes = store.close_matrix(list(universe), start=start)
+
+    day_index = np.searchsorted(dates, buy_dates, side="left")
+    in_range = day_index < len(dates)
+    if not in_range.any():
+        return None
+    day_index, symbol_index = day_index[in_range], symbol_index[in_range]
+    quantities, buy_prices = quantities[in_range], buy_prices[in_range]
+
+    share_deltas = np.zeros_like(closes)
+    np.add.at(share_deltas, (day_index, symbol_index), quantities)
+    shares = np.cumsum(share_deltas, axis=0)
+    values = np.einsum("ij,ij->i", shares, closes)
+
+    flows = np.zeros(len(dates))
+    np.add.at(flows, day_index, quantities * buy_prices)
+    invested = np.cumsum(flows)
+
+    # Daily sub-period returns with each day's purchases removed from its end value
+    # (the first day of an empty portfolio is measured against its purchases)
+    previous = np.concatenate(([0.0], values[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(
+            previous > 0,
+            (values - flows) / previous - 1,
+            np.where(flows > 0, values / flows - 1, 0.0)
+        )
+    twr = float(np.prod(1 + daily) - 1)
+    span_days = int((dates[-1] - dates[0]).astype(int)) or 1
+    twr_annualized = float((1 + twr) ** (365 / span_days) - 1)
+
+    flow_days = np.flatnonzero(flows)
+    amounts = np.concatenate((-flows[flow_days], [values[-1]]))
+    offsets = np.concatenate((dates[flow_days], dates[-1:])).astype(int).astype(float)
+    irr = xirr(amounts, offsets)
+
+    return {
+        "dates": dates,
+        "values": values,
+        "invested": invested,
+        "twr": twr,
+        "twr_annualized": twr_annualized,
+        "xirr": irr
+    }
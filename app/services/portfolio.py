@@ -1,52 +1,39 @@
-import random
 from datetime import date
-from sqlalchemy import select, delete
+import numpy as np
+from sqlalchemy import select, delete, func, insert, literal
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.portfolio import PortfolioHolding, StockWatchlist
+from app.models.portfolio import PortfolioHolding, PortfolioPosition, StockWatchlist, WatchlistAlert
+from app.services.prices import MOCK_STOCK_DATA, price_cache
+from app.services.timeseries import BENCHMARK_SYMBOL, SYMBOL_PATTERN, price_history
+from app.services.performance import compute_performance
+from app.services.risk import compute_risk, covariance_cache
+from app.services.alerts import alert_engine
 from app.schemas import (
     PortfolioHoldingCreate, 
     PortfolioHoldingUpdate, 
     PortfolioHoldingResponse,
     WatchlistItemCreate,
     WatchlistItemResponse,
-    PortfolioSummary
+    PortfolioSummary,
+    PortfolioSnapshot,
+    StockQuote,
+    PriceHistory,
+    PortfolioPerformance,
+    HoldingRisk,
+    PortfolioRisk
 )
 
 
-# Mock stock prices - In production, integrate with real stock API (Alpha Vantage, Yahoo Finance, etc.)
-MOCK_STOCK_DATA = {
-    "RELIANCE": {"price": 2875.50, "name": "Reliance Industries Ltd"},
-    "TCS": {"price": 4125.80, "name": "Tata Consultancy Services Ltd"},
-    "INFY": {"price": 1685.25, "name": "Infosys Ltd"},
-    "HDFCBANK": {"price": 1720.40, "name": "HDFC Bank Ltd"},
-    "ICICIBANK": {"price": 1245.60, "name": "ICICI Bank Ltd"},
-    "HINDUNILVR": {"price": 2450.30, "name": "Hindustan Unilever Ltd"},
-    "ITC": {"price": 465.80, "name": "ITC Ltd"},
-    "SBIN": {"price": 785.25, "name": "State Bank of India"},
-    "BHARTIARTL": {"price": 1580.90, "name": "Bharti Airtel Ltd"},
-    "KOTAKBANK": {"price": 1890.45, "name": "Kotak Mahindra Bank Ltd"},
-    "LT": {"price": 3650.20, "name": "Larsen & Toubro Ltd"},
-    "ASIANPAINT": {"price": 2890.75, "name": "Asian Paints Ltd"},
-    "MARUTI": {"price": 12450.60, "name": "Maruti Suzuki India Ltd"},
-    "WIPRO": {"price": 485.30, "name": "Wipro Ltd"},
-    "TATAMOTORS": {"price": 985.40, "name": "Tata Motors Ltd"},
-    "TATASTEEL": {"price": 145.85, "name": "Tata Steel Ltd"},
-    "ADANIENT": {"price": 2850.60, "name": "Adani Enterprises Ltd"},
-    "BAJFINANCE": {"price": 7250.80, "name": "Bajaj Finance Ltd"},
-    "HCLTECH": {"price": 1685.45, "name": "HCL Technologies Ltd"},
-    "SUNPHARMA": {"price": 1725.30, "name": "Sun Pharmaceutical Industries Ltd"},
-}
-
-
-def get_current_price(symbol: str) -> float:
-    """Get current stock price with slight random variation to simulate real-time updates"""
-    if symbol.upper() in MOCK_STOCK_DATA:
-        base_price = MOCK_STOCK_DATA[symbol.upper()]["price"]
-        # Add small random variation (±2%) to simulate price movement
-        variation = random.uniform(-0.02, 0.02)
-        return round(base_price * (1 + variation), 2)
-    # For unknown symbols, generate a random price
-    return round(random.uniform(100, 5000), 2)
+async def get_current_price(symbol: str) -> float:
+    """Get the current stock price from the shared quote cache"""
+    return await price_cache.get(symbol)
+
+
+async def get_quotes(symbols: list[str]) -> dict[str, float]:
+    """Get current prices for many symbols with one batched quote-cache lookup"""
+    return await price_cache.get_many(symbols)
 
 
 def get_stock_suggestions() -> list[dict]:
@@ -57,6 +44,33 @@ def get_stock_suggestions() -> list[dict]:
     ]
 
 
+async def get_stock_quotes(symbols: list[str]) -> list[StockQuote]:
+    """Get quotes for a list of symbols in one batch"""
+    prices = await get_quotes(symbols)
+    return [
+        StockQuote(
+            symbol=symbol,
+            name=MOCK_STOCK_DATA.get(symbol, {}).get("name"),
+            price=price
+        )
+        for symbol, price in prices.items()
+    ]
+
+
+def get_price_history(symbol: str, start: date | None = None, end: date | None = None) -> PriceHistory:
+    """Daily OHLCV for a symbol between two dates"""
+    series = price_history.get(symbol, start, end)
+    return PriceHistory(
+        symbol=symbol.upper(),
+        dates=series["dates"].astype(str).tolist(),
+        open=series["open"].tolist(),
+        high=series["high"].tolist(),
+        low=series["low"].tolist(),
+        close=series["close"].tolist(),
+        volume=series["volume"].tolist()
+    )
+
+
 async def create_holding(
     db: AsyncSession, 
     user_id: int, 
@@ -73,21 +87,24 @@ async def create_holding(
         notes=holding_data.notes
     )
     db.add(holding)
+    await _apply_lot(db, user_id, holding.symbol, holding.quantity, holding.buy_price, 1)
     await db.commit()
     await db.refresh(holding)
     return holding
 
 
-async def get_user_holdings(db: AsyncSession, user_id: int) -> list[PortfolioHoldingResponse]:
-    """Get all holdings for a user with current prices and calculations"""
+async def get_portfolio_snapshot(db: AsyncSession, user_id: int) -> PortfolioSnapshot:
+    """Price every holding and build the summary in a single pass over the rows"""
     result = await db.execute(
         select(PortfolioHolding).where(PortfolioHolding.user_id == user_id)
     )
     holdings = result.scalars().all()
+    prices = await get_quotes([h.symbol for h in holdings])
     
     response = []
+    positions: dict[str, dict] = {}
     for h in holdings:
-        current_price = get_current_price(h.symbol)
+        current_price = prices[h.symbol.upper()]
         current_value = current_price * h.quantity
         invested_value = h.buy_price * h.quantity
         gain_loss = current_value - invested_value
@@ -107,8 +124,22 @@ async def get_user_holdings(db: AsyncSession, user_id: int) -> list[PortfolioHol
             gain_loss=round(gain_loss, 2),
             gain_loss_percent=round(gain_loss_percent, 2)
         ))
+        
+        # Consolidate lots per symbol so the summary matches /summary exactly
+        position = positions.setdefault(
+            h.symbol.upper(), {"symbol": h.symbol.upper(), "quantity": 0.0, "invested_value": 0.0, "lots": 0}
+        )
+        position["quantity"] += h.quantity
+        position["invested_value"] += invested_value
+        position["lots"] += 1
     
-    return response
+    summary = summarize_positions([positions[s] for s in sorted(positions)], prices)
+    return PortfolioSnapshot(holdings=response, summary=summary)
+
+
+async def get_user_holdings(db: AsyncSession, user_id: int) -> list[PortfolioHoldingResponse]:
+    """Get all holdings for a user with current prices and calculations"""
+    return (await get_portfolio_snapshot(db, user_id)).holdings
 
 
 async def get_holding_by_id(db: AsyncSession, holding_id: int, user_id: int) -> PortfolioHolding | None:
@@ -135,9 +166,12 @@ async def update_holding(
     if 'symbol' in update_dict and update_dict['symbol']:
         update_dict['symbol'] = update_dict['symbol'].upper()
     
+    # Move the lot's contribution from its old position to its new one
+    await _apply_lot(db, holding.user_id, holding.symbol, -holding.quantity, holding.buy_price, -1)
     for key, value in update_dict.items():
         if value is not None:
             setattr(holding, key, value)
+    await _apply_lot(db, holding.user_id, holding.symbol, holding.quantity, holding.buy_price, 1)
     
     await db.commit()
     await db.refresh(holding)
@@ -146,49 +180,233 @@ async def update_holding(
 
 async def delete_holding(db: AsyncSession, holding_id: int, user_id: int) -> bool:
     """Delete a holding"""
-    result = await db.execute(
-        delete(PortfolioHolding).where(
-            PortfolioHolding.id == holding_id,
-            PortfolioHolding.user_id == user_id
+    holding = await get_holding_by_id(db, holding_id, user_id)
+    if holding is None:
+        return False
+    await _apply_lot(db, user_id, holding.symbol, -holding.quantity, holding.buy_price, -1)
+    await db.delete(holding)
+    await db.commit()
+    return True
+
+
+async def _apply_lot(
+    db: AsyncSession,
+    user_id: int,
+    symbol: str,
+    quantity: float,
+    buy_price: float,
+    lots: int
+):
+    """Add (positive quantity/lots) or remove (negative) a lot from the user's position in `symbol`.
+
+    A single INSERT ... ON CONFLICT DO UPDATE applies the increments inside
+    the database, so concurrent writers to one position neither lose updates
+    nor race on creating its row. Removing a lot whose row is missing inserts
+    a row with lots <= 0, which the delete below drops again.
+    """
+    stmt = _insert(db)(PortfolioPosition).values(
+        user_id=user_id,
+        symbol=symbol,
+        quantity=quantity,
+        total_cost=quantity * buy_price,
+        lots=lots,
+        realized_pnl=0.0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "symbol"],
+        set_={
+            "quantity": PortfolioPosition.quantity + stmt.excluded.quantity,
+            "total_cost": PortfolioPosition.total_cost + stmt.excluded.total_cost,
+            "lots": PortfolioPosition.lots + stmt.excluded.lots,
+            "updated_at": func.now()
+        }
+    )
+    await db.execute(stmt)
+    await db.execute(
+        delete(PortfolioPosition).where(
+            PortfolioPosition.user_id == user_id,
+            PortfolioPosition.symbol == symbol,
+            PortfolioPosition.lots <= 0
+        )
+    )
+
+
+def _insert(db: AsyncSession):
+    """Dialect insert() for the session's database (both support ON CONFLICT)"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql_insert
+    return sqlite_insert
+
+
+async def rebuild_positions(db: AsyncSession):
+    """Recompute every position from the holding lots (used to backfill existing databases)"""
+    await db.execute(delete(PortfolioPosition))
+    await db.execute(
+        insert(PortfolioPosition).from_select(
+            ["user_id", "symbol", "quantity", "total_cost", "lots", "realized_pnl"],
+            select(
+                PortfolioHolding.user_id,
+                PortfolioHolding.symbol,
+                func.sum(PortfolioHolding.quantity),
+                func.sum(PortfolioHolding.quantity * PortfolioHolding.buy_price),
+                func.count(PortfolioHolding.id),
+                literal(0.0)
+            ).group_by(PortfolioHolding.user_id, PortfolioHolding.symbol)
         )
     )
     await db.commit()
-    return result.rowcount > 0
 
 
-async def get_portfolio_summary(db: AsyncSession, user_id: int) -> PortfolioSummary:
-    """Calculate portfolio summary statistics"""
-    holdings = await get_user_holdings(db, user_id)
-    
-    if not holdings:
-        return PortfolioSummary(
-            total_invested=0,
-            current_value=0,
-            total_gain_loss=0,
-            total_gain_loss_percent=0,
-            holdings_count=0
+async def sync_positions(db: AsyncSession):
+    """Backfill positions if lots exist but the position table is still empty"""
+    has_positions = (await db.execute(select(PortfolioPosition.id).limit(1))).first()
+    has_holdings = (await db.execute(select(PortfolioHolding.id).limit(1))).first()
+    if has_holdings and not has_positions:
+        await rebuild_positions(db)
+
+
+async def get_symbol_positions(db: AsyncSession, user_id: int) -> list[dict]:
+    """Per-symbol quantity, invested value and lot count, read from the position table"""
+    result = await db.execute(
+        select(
+            PortfolioPosition.symbol,
+            PortfolioPosition.quantity,
+            PortfolioPosition.total_cost.label("invested_value"),
+            PortfolioPosition.lots
         )
+        .where(PortfolioPosition.user_id == user_id)
+        .order_by(PortfolioPosition.symbol)
+    )
+    return [row._asdict() for row in result]
+
+
+def summarize_positions(positions: list[dict], prices: dict[str, float]) -> PortfolioSummary:
+    """Portfolio summary from per-symbol positions (ordered by symbol), one price per distinct symbol.
+
+    Top and worst performer are ranked per symbol, by the return of the whole
+    position; used by both /summary and /snapshot so they always agree.
+    """
+    total_invested = 0.0
+    current_total = 0.0
+    holdings_count = 0
+    top = worst = None
+    for p in positions:
+        current_value = prices[p["symbol"].upper()] * p["quantity"]
+        gain_loss_percent = ((current_value - p["invested_value"]) / p["invested_value"] * 100) if p["invested_value"] > 0 else 0
+        total_invested += p["invested_value"]
+        current_total += current_value
+        holdings_count += p["lots"]
+        if top is None or gain_loss_percent > top[1]:
+            top = (p["symbol"], gain_loss_percent)
+        if worst is None or gain_loss_percent <= worst[1]:
+            worst = (p["symbol"], gain_loss_percent)
     
-    total_invested = sum(h.invested_value for h in holdings)
-    current_value = sum(h.current_value for h in holdings)
-    total_gain_loss = current_value - total_invested
+    total_gain_loss = current_total - total_invested
     total_gain_loss_percent = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
     
-    # Find top and worst performers
-    sorted_by_gain = sorted(holdings, key=lambda x: x.gain_loss_percent, reverse=True)
-    top_performer = sorted_by_gain[0].symbol if sorted_by_gain else None
-    worst_performer = sorted_by_gain[-1].symbol if sorted_by_gain else None
-    
     return PortfolioSummary(
         total_invested=round(total_invested, 2),
-        current_value=round(current_value, 2),
+        current_value=round(current_total, 2),
         total_gain_loss=round(total_gain_loss, 2),
         total_gain_loss_percent=round(total_gain_loss_percent, 2),
-        holdings_count=len(holdings),
-        top_performer=top_performer,
-        worst_performer=worst_performer
+        holdings_count=holdings_count,
+        top_performer=top[0] if top else None,
+        worst_performer=worst[0] if worst else None
+    )
+
+
+async def get_portfolio_summary(db: AsyncSession, user_id: int) -> PortfolioSummary:
+    """Calculate portfolio summary statistics from SQL-side per-symbol aggregates"""
+    positions = await get_symbol_positions(db, user_id)
+    prices = await get_quotes([p["symbol"] for p in positions])
+    return summarize_positions(positions, prices)
+
+
+def _has_history(symbol: str) -> bool:
+    """Rows saved before symbols were validated may name symbols the price history store rejects"""
+    return SYMBOL_PATTERN.match(symbol.upper()) is not None
+
+
+async def get_portfolio_performance(db: AsyncSession, user_id: int) -> PortfolioPerformance:
+    """Daily portfolio value, time-weighted return and XIRR from the user's buy lots"""
+    result = await db.execute(
+        select(
+            PortfolioHolding.symbol,
+            PortfolioHolding.quantity,
+            PortfolioHolding.buy_price,
+            PortfolioHolding.buy_date
+        ).where(PortfolioHolding.user_id == user_id)
     )
+    lots = [lot for lot in result.all() if _has_history(lot.symbol)]
+    if not lots:
+        return PortfolioPerformance()
+    
+    symbols, quantities, buy_prices, buy_dates = zip(*lots)
+    performance = compute_performance(
+        price_history,
+        np.array([s.upper() for s in symbols]),
+        np.array(quantities, dtype=float),
+        np.array(buy_prices, dtype=float),
+        np.array(buy_dates, dtype="datetime64[D]")
+    )
+    if performance is None:
+        return PortfolioPerformance()
+    return PortfolioPerformance(
+        dates=performance["dates"].astype(str).tolist(),
+        values=np.round(performance["values"], 2).tolist(),
+        invested=np.round(performance["invested"], 2).tolist(),
+        twr=round(performance["twr"] * 100, 2),
+        twr_annualized=round(performance["twr_annualized"] * 100, 2),
+        xirr=round(performance["xirr"] * 100, 2) if performance["xirr"] is not None else None
+    )
+
 
+async def get_portfolio_risk(
+    db: AsyncSession,
+    user_id: int,
+    window_days: int = 365,
+    confidence: float = 0.95
+) -> PortfolioRisk:
+    """Volatility, correlation, beta vs the benchmark index and one-day VaR, weighted by current position values"""
+    positions = [
+        p for p in await get_symbol_positions(db, user_id)
+        if p["quantity"] > 0 and _has_history(p["symbol"])
+    ]
+    empty = PortfolioRisk(confidence=confidence, window_days=window_days, benchmark=BENCHMARK_SYMBOL)
+    if not positions:
+        return empty
+    
+    prices = await get_quotes([p["symbol"] for p in positions])
+    values: dict[str, float] = {}
+    for p in positions:
+        symbol = p["symbol"].upper()
+        values[symbol] = values.get(symbol, 0.0) + prices[symbol] * p["quantity"]
+    risk = compute_risk(price_history, covariance_cache, values, window_days, confidence)
+    if risk["observations"] < 2:
+        return empty
+    
+    return PortfolioRisk(
+        holdings=[
+            HoldingRisk(
+                symbol=symbol,
+                weight=round(float(weight) * 100, 2),
+                volatility=round(float(volatility) * 100, 2),
+                beta=round(float(beta), 3)
+            )
+            for symbol, weight, volatility, beta in zip(
+                risk["symbols"], risk["weights"], risk["volatilities"], risk["betas"]
+            )
+        ],
+        correlation=np.round(risk["correlation"], 3).tolist(),
+        portfolio_value=round(risk["portfolio_value"], 2),
+        volatility=round(risk["volatility"] * 100, 2),
+        beta=round(risk["beta"], 3),
+        var_historical=round(risk["var_historical"], 2),
+        var_parametric=round(risk["var_parametric"], 2),
+        confidence=confidence,
+        window_days=window_days,
+        benchmark=BENCHMARK_SYMBOL
+    )
 
 # Watchlist operations
 async def add_to_watchlist(
@@ -207,6 +425,7 @@ async def add_to_watchlist(
     db.add(item)
     await db.commit()
     await db.refresh(item)
+    alert_engine.add(item.id, user_id, item.symbol, item.target_price)
     return item
 
 
@@ -216,6 +435,7 @@ async def get_user_watchlist(db: AsyncSession, user_id: int) -> list[WatchlistIt
         select(StockWatchlist).where(StockWatchlist.user_id == user_id)
     )
     items = result.scalars().all()
+    prices = await get_quotes([item.symbol for item in items])
     
     return [
         WatchlistItemResponse(
@@ -223,7 +443,7 @@ async def get_user_watchlist(db: AsyncSession, user_id: int) -> list[WatchlistIt
             symbol=item.symbol,
             company_name=item.company_name,
             target_price=item.target_price,
-            current_price=get_current_price(item.symbol),
+            current_price=prices[item.symbol.upper()],
             notes=item.notes
         )
         for item in items
@@ -231,12 +451,27 @@ async def get_user_watchlist(db: AsyncSession, user_id: int) -> list[WatchlistIt
 
 
 async def remove_from_watchlist(db: AsyncSession, item_id: int, user_id: int) -> bool:
-    """Remove a stock from watchlist"""
+    """Remove a stock from watchlist, along with its fired alerts"""
     result = await db.execute(
         delete(StockWatchlist).where(
             StockWatchlist.id == item_id,
             StockWatchlist.user_id == user_id
         )
     )
+    if result.rowcount == 0:
+        return False
+    await db.execute(delete(WatchlistAlert).where(WatchlistAlert.watchlist_id == item_id))
     await db.commit()
-    return result.rowcount > 0
+    alert_engine.remove(item_id)
+    return True
+
+
+async def get_user_alerts(db: AsyncSession, user_id: int, limit: int = 50) -> list[WatchlistAlert]:
+    """Most recent fired watchlist alerts for a user"""
+    result = await db.execute(
+        select(WatchlistAlert)
+        .where(WatchlistAlert.user_id == user_id)
+        .order_by(WatchlistAlert.created_at.desc(), WatchlistAlert.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from app.config import settings
+
+
+# Mock stock prices - In production, integrate with real stock API (Alpha Vantage, Yahoo Finance, etc.)
+MOCK_STOCK_DATA = {
+    "RELIANCE": {"price": 2875.50, "name": "Reliance Industries Ltd"},
+    "TCS": {"price": 4125.80, "name": "Tata Consultancy Services Ltd"},
+    "INFY": {"price": 1685.25, "name": "Infosys Ltd"},
+    "HDFCBANK": {"price": 1720.40, "name": "HDFC Bank Ltd"},
+    "ICICIBANK": {"price": 1245.60, "name": "ICICI Bank Ltd"},
+    "HINDUNILVR": {"price": 2450.30, "name": "Hindustan Unilever Ltd"},
+    "ITC": {"price": 465.80, "name": "ITC Ltd"},
+    "SBIN": {"price": 785.25, "name": "State Bank of India"},
+    "BHARTIARTL": {"price": 1580.90, "name": "Bharti Airtel Ltd"},
+    "KOTAKBANK": {"price": 1890.45, "name": "Kotak Mahindra Bank Ltd"},
+    "LT": {"price": 3650.20, "name": "Larsen & Toubro Ltd"},
+    "ASIANPAINT": {"price": 2890.75, "name": "Asian Paints Ltd"},
+    "MARUTI": {"price": 12450.60, "name": "Maruti Suzuki India Ltd"},
+    "WIPRO": {"price": 485.30, "name": "Wipro Ltd"},
+    "TATAMOTORS": {"price": 985.40, "name": "Tata Motors Ltd"},
+    "TATASTEEL": {"price": 145.85, "name": "Tata Steel Ltd"},
+    "ADANIENT": {"price": 2850.60, "name": "Adani Enterprises Ltd"},
+    "BAJFINANCE": {"price": 7250.80, "name": "Bajaj Finance Ltd"},
+    "HCLTECH": {"price": 1685.45, "name": "HCL Technologies Ltd"},
+    "SUNPHARMA": {"price": 1725.30, "name": "Sun Pharmaceutical Industries Ltd"},
+}
+
+
+# Market indices used as benchmarks (not offered as portfolio stocks)
+MOCK_INDEX_DATA = {
+    "NIFTY50": {"price": 24850.75, "name": "Nifty 50"},
+}
+
+
+class PriceProvider:
+    """Source of live prices. Implementations fetch many symbols per call."""
+
+    async def fetch(self, symbols: list[str]) -> dict[str, float]:
+        raise NotImplementedError
+
+
+class SimulatedPriceFeed(PriceProvider):
+    """Offline feed: MOCK_STOCK_DATA prices with a small random variation (±2%) per fetch"""
+
+    def base_price(self, symbol: str) -> float:
+        if symbol in MOCK_STOCK_DATA:
+            return MOCK_STOCK_DATA[symbol]["price"]
+        if symbol in MOCK_INDEX_DATA:
+            return MOCK_INDEX_DATA[symbol]["price"]
+        # Unknown symbols get a stable pseudo-random base price
+        return round(random.Random(symbol).uniform(100, 5000), 2)
+
+    async def fetch(self, symbols: list[str]) -> dict[str, float]:
+        return {
+            symbol: round(self.base_price(symbol) * (1 + random.uniform(-0.02, 0.02)), 2)
+            for symbol in symbols
+        }
+
+
+class QuoteCache:
+    """Shared in-process quote cache in front of a PriceProvider.
+
+    Quotes younger than `ttl` are served as-is. Quotes between `ttl` and
+    `stale_ttl` are served immediately while a background refresh runs
+    (stale-while-revalidate). Older or missing quotes are fetched before
+    returning. Concurrent requests for the same symbols share one fetch.
+
+    Memory is bounded: quotes older than `stale_ttl` are swept after each
+    successful fetch, and at most `max_entries` quotes are kept (least
+    recently stored first out).
+    """
+
+    def __init__(self, provider: PriceProvider, ttl: float, stale_ttl: float, max_entries: int = 5000):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._quotes: OrderedDict[str, tuple[float, float]] = OrderedDict()  # symbol -> (price, fetched_at)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        return (await self.get_many([symbol]))[symbol]
+
+    async def get_many(self, symbols: Iterable[str]) -> dict[str, float]:
+        """Prices for all requested symbols (upper-cased), with at most one provider fetch"""
+        now = time.monotonic()
+        prices: dict[str, float] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            entry = self._quotes.get(symbol)
+            if entry is None or now - entry[1] > self.stale_ttl:
+                missing.append(symbol)
+            else:
+                prices[symbol] = entry[0]
+                if now - entry[1] > self.ttl:
+                    stale.append(symbol)
+
+        if stale:
+            self._start_fetch(stale)
+        if missing:
+            self._start_fetch(missing)
+            tasks = {self._inflight[s] for s in missing if s in self._inflight}
+            for task in tasks:
+                fetched = await asyncio.shield(task)
+                prices.update({s: fetched[s] for s in missing if s in fetched})
+            # If the provider failed, fall back to the last known (expired) quote if not yet swept
+            for symbol in missing:
+                if symbol not in prices and symbol in self._quotes:
+                    prices[symbol] = self._quotes[symbol][0]
+        return prices
+
+    def invalidate(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._quotes.clear()
+        else:
+            self._quotes.pop(symbol.upper(), None)
+
+    def _evict(self, now: float):
+        """Drop quotes past `stale_ttl` (oldest are at the front), then enforce `max_entries`"""
+        while self._quotes:
+            symbol, (_, fetched_at) = next(iter(self._quotes.items()))
+            if now - fetched_at <= self.stale_ttl and len(self._quotes) <= self.max_entries:
+                break
+            del self._quotes[symbol]
+
+    def _start_fetch(self, symbols: list[str]):
+        """Fetch the symbols not already being fetched in one background task"""
+        symbols = [s for s in symbols if s not in self._inflight]
+        if not symbols:
+            return
+        task = asyncio.ensure_future(self._fetch(symbols))
+        for symbol in symbols:
+            self._inflight[symbol] = task
+
+    async def _fetch(self, symbols: list[str]) -> dict[str, float]:
+        try:
+            fetched = await self.provider.fetch(symbols)
+            now = time.monotonic()
+            for symbol, price in fetched.items():
+                self._quotes[symbol] = (price, now)
+                self._quotes.move_to_end(symbol)
+            self._evict(now)
+            return fetched
+        except Exception as e:
+            print(f"Price fetch error for {symbols}: {e}")
+            return {}
+        finally:
+            for symbol in symbols:
+                self._inflight.pop(symbol, None)
+
+
+def create_price_provider() -> PriceProvider:
+    """Price provider selected by `price_provider` (only "simulated" ships with the app)"""
+    if settings.price_provider != "simulated":
+        print(f"⚠️ Unknown price provider '{settings.price_provider}'. Using simulated prices.")
+    return SimulatedPriceFeed()
+
+
+# Global quote cache shared by all requests in this worker
+price_cache = QuoteCache(
+    create_price_provider(),
+    ttl=settings.price_ttl,
+    stale_ttl=settings.price_stale_ttl,
+    max_entries=settings.price_cache_size
+)
@@ -1,15 +1,26 @@
+import asyncio
+import json
 import os
 import uuid
-from typing import Optional
+from typing import AsyncIterator, Optional
 import httpx
+import numpy as np
 
 import google.generativeai as genai
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.config import settings
+from app.services.answer_cache import AnswerCache
+from app.services.intents import IntentRouter, knowledge_intents
+from app.services.knowledge import KnowledgeIndex, chunk_markdown
+from app.services.sessions import create_session_store
 
 # Vector store path
 CHROMA_PATH = "chroma_db"
 
+GEMINI_MODEL = "gemini-2.0-flash-lite"
+
+FALLBACK_SOURCES = ["Financial Knowledge Base"]
+
 # Financial knowledge base content
 FINANCIAL_KNOWLEDGE = """
 # Stock Market Investment Guide
@@ -139,6 +150,54 @@ Premium stock analysis and insights
 """
 
 # System prompt for financial advisor
+# Fallback intents used when no AI provider is configured. Each keyword hit scores
+# 2.0, while a knowledge-base section scores at most 1.0 in total (its weight is
+# split across its heading words), so a hand-written answer beats any section it
+# overlaps with.
+FALLBACK_INTENTS = [
+    {
+        "name": "demat",
+        "keywords": ["demat"],
+        "answer": "A Demat account is required to hold shares in electronic form. To open one, you need your PAN Card, Aadhaar Card, and bank account. Popular brokers include Zerodha, Groww, Upstox, and Angel One.",
+        "weight": 2.0
+    },
+    {
+        "name": "sip",
+        "keywords": ["sip", "systematic"],
+        "answer": "SIP (Systematic Investment Plan) allows you to invest a fixed amount regularly in mutual funds. It helps average out market volatility and builds wealth through the power of compounding.",
+        "weight": 2.0
+    },
+    {
+        "name": "tax",
+        "keywords": ["tax", "80c"],
+        "answer": "Under Section 80C, you can save up to ₹1.5 Lakh through investments like ELSS Mutual Funds (3-year lock-in), PPF, NSC, and life insurance premiums. Capital gains tax is 15% for short-term (<1 year) and 10% for long-term gains above ₹1 Lakh.",
+        "weight": 2.0
+    },
+    {
+        "name": "mutual_fund",
+        "keywords": ["mutual fund"],
+        "answer": "Mutual funds pool money from multiple investors to invest in diversified portfolios. They're managed by professionals and are great for beginners. Start with index funds or large-cap funds for lower risk.",
+        "weight": 2.0
+    },
+    {
+        "name": "getting_started",
+        "keywords": ["start", "begin", "how to invest"],
+        "answer": "To start investing: 1) Open a Demat account with a broker like Zerodha or Groww. 2) Build an emergency fund (6-12 months expenses). 3) Start with SIPs in index funds or large-cap mutual funds. 4) Gradually learn about direct stock investing.",
+        "weight": 2.0
+    },
+    {
+        "name": "risk",
+        "keywords": ["risk"],
+        "answer": "Key risk management strategies: 1) Diversify across sectors and asset classes. 2) Never invest more than you can afford to lose. 3) Use stop-loss orders. 4) Maintain an emergency fund. 5) Invest for the long term to ride out volatility.",
+        "weight": 2.0
+    },
+]
+
+FALLBACK_HELP = "I'm your financial advisor assistant! I can help you with:\n\n• **Getting Started** - Opening Demat accounts, first investments\n• **SIP & Mutual Funds** - Understanding systematic investment plans\n• **Tax Saving** - Section 80C, capital gains, tax-efficient investing\n• **Risk Management** - Diversification, stop-loss strategies\n• **Stock Market Basics** - NSE, BSE, Sensex, Nifty\n\n⚠️ Note: Gemini AI is not configured. Please add your GEMINI_API_KEY to the .env file for intelligent responses.\n\nWhat would you like to know about?"
+
+FALLBACK_ROUTER = IntentRouter(FALLBACK_INTENTS + knowledge_intents(FINANCIAL_KNOWLEDGE))
+
+
 SYSTEM_PROMPT = """You are a helpful and knowledgeable financial advisor assistant. Your role is to:
 
 1. Provide clear, accurate financial advice based on the context provided
@@ -166,13 +225,20 @@ class RAGService:
         self.model = None
         self.openai_client = None
         self.ollama_available = False
-        self.chat_sessions = {}
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.sessions = create_session_store()
+        self.index = KnowledgeIndex(CHROMA_PATH)
+        self.answer_cache = AnswerCache(
+            max_entries=settings.answer_cache_size,
+            ttl_seconds=settings.answer_cache_ttl,
+            similarity_threshold=settings.answer_cache_similarity
+        )
         self.provider = settings.ai_provider.lower()
         
         if self.provider == "openai":
             self._init_openai()
         elif self.provider == "ollama":
-            self._init_ollama()
+            pass  # Connection pool is opened in start() from the app lifespan
         else:
             self._init_gemini()
     
@@ -180,7 +246,7 @@ class RAGService:
         """Initialize OpenAI client"""
         if settings.openai_api_key and settings.openai_api_key != "your-openai-api-key-here":
             try:
-                self.openai_client = OpenAI(api_key=settings.openai_api_key)
+                self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
                 print("✅ OpenAI initialized successfully!")
             except Exception as e:
                 print(f"⚠️ Failed to initialize OpenAI: {e}")
@@ -188,11 +254,34 @@ class RAGService:
         else:
             print("⚠️ OpenAI API key not configured. Using fallback responses.")
     
-    def _init_ollama(self):
-        """Initialize Ollama client"""
+    async def start(self):
+        """Load the knowledge index and open long-lived clients that need a running event loop"""
+        await asyncio.to_thread(self.index.load_or_build, FINANCIAL_KNOWLEDGE)
+        self.answer_cache.embedder = self.index.embedder
+        if self.provider == "ollama":
+            await self._init_ollama()
+
+    async def close(self):
+        """Release pooled connections on shutdown"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        self.ollama_available = False
+
+    async def _init_ollama(self):
+        """Initialize the pooled Ollama client"""
+        self.http_client = httpx.AsyncClient(
+            base_url=settings.ollama_base_url,
+            timeout=httpx.Timeout(settings.ollama_timeout, connect=settings.ollama_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_keepalive_connections,
+                keepalive_expiry=settings.ollama_keepalive_expiry
+            )
+        )
         try:
             # Check if Ollama is running
-            response = httpx.get(f"{settings.ollama_base_url}/api/tags", timeout=5.0)
+            response = await self.http_client.get("/api/tags", timeout=5.0)
             if response.status_code == 200:
                 self.ollama_available = True
                 print(f"✅ Ollama initialized successfully! Model: {settings.ollama_model}")
@@ -208,10 +297,7 @@ class RAGService:
         if settings.gemini_api_key and settings.gemini_api_key != "your-gemini-api-key-here":
             try:
                 genai.configure(api_key=settings.gemini_api_key)
-                self.model = genai.GenerativeModel(
-                    model_name="gemini-2.0-flash-lite",
-                    system_instruction=SYSTEM_PROMPT.format(context=FINANCIAL_KNOWLEDGE)
-                )
+                self.model = genai.GenerativeModel(model_name=GEMINI_MODEL)
                 print("✅ Gemini AI initialized successfully!")
             except Exception as e:
                 print(f"⚠️ Failed to initialize Gemini: {e}")
@@ -220,19 +306,55 @@ class RAGService:
             print("⚠️ Gemini API key not configured. Using fallback responses.")
     
     def add_documents(self, texts: list[str]):
-        """Add new documents to the knowledge base"""
-        # Placeholder for future implementation with vector DB
-        pass
+        """Chunk, embed and add new documents to the knowledge index"""
+        if not self.index.ready:
+            self.index.load_or_build(FINANCIAL_KNOWLEDGE)
+        self.index.add([chunk for text in texts for chunk in chunk_markdown(text)])
+        self.answer_cache.clear()
+    
+    def _system_prompt(self, question: str, vector: Optional[np.ndarray] = None) -> str:
+        """System prompt carrying only the knowledge chunks relevant to the question"""
+        if not self.index.ready:
+            return SYSTEM_PROMPT.format(context=FINANCIAL_KNOWLEDGE)
+        chunks = self.index.search(question, k=settings.rag_top_k, vector=vector)
+        return SYSTEM_PROMPT.format(context="\n\n".join(chunks))
+    
+    async def _embed_question(self, question: str) -> Optional[np.ndarray]:
+        """Embed the question once per request, off the event loop (model inference blocks)"""
+        if self.index.embedder is None:
+            return None
+        return (await asyncio.to_thread(self.index.embedder.embed, [question]))[0]
     
     async def get_answer(self, question: str, session_id: Optional[str] = None) -> dict:
-        """Get answer using OpenAI, Gemini, Ollama, or fallback to pattern matching"""
+        """Get answer from the answer cache, or via _get_answer on a miss.
+
+        Only the opening question of a conversation is cached: follow-ups depend
+        on earlier turns and always go to the provider.
+        """
         if session_id is None:
             session_id = str(uuid.uuid4())
+            cacheable = True
+        else:
+            cacheable = not (await self.sessions.get(session_id))["messages"]
+        
+        vector = await self._embed_question(question)
+        if cacheable:
+            cached = self.answer_cache.get(question, vector)
+            if cached:
+                await self.sessions.append(session_id, question, cached["answer"])
+                return {**cached, "session_id": session_id}
         
+        result = await self._get_answer(question, session_id, vector)
+        if cacheable and result["answer"] and result["sources"] != FALLBACK_SOURCES:
+            self.answer_cache.put(question, result["answer"], result["sources"], vector)
+        return result
+    
+    async def _get_answer(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> dict:
+        """Get answer using OpenAI, Gemini, Ollama, or fallback to pattern matching"""
         # Try OpenAI if configured
         if self.provider == "openai" and self.openai_client:
             try:
-                answer = await self._get_openai_response(question, session_id)
+                answer = await self._get_openai_response(question, session_id, vector)
                 return {
                     "answer": answer,
                     "sources": ["OpenAI GPT-4o Financial Advisor", "Financial Knowledge Base"],
@@ -244,7 +366,7 @@ class RAGService:
         # Try Ollama if configured
         elif self.provider == "ollama" and self.ollama_available:
             try:
-                answer = await self._get_ollama_response(question, session_id)
+                answer = await self._get_ollama_response(question, session_id, vector)
                 return {
                     "answer": answer,
                     "sources": [f"Ollama {settings.ollama_model} Financial Advisor", "Financial Knowledge Base"],
@@ -256,7 +378,7 @@ class RAGService:
         # Try Gemini if configured
         elif self.provider == "gemini" and self.model:
             try:
-                answer = await self._get_gemini_response(question, session_id)
+                answer = await self._get_gemini_response(question, session_id, vector)
                 return {
                     "answer": answer,
                     "sources": ["Gemini AI Financial Advisor", "Financial Knowledge Base"],
@@ -270,102 +392,206 @@ class RAGService:
         
         return {
             "answer": answer,
-            "sources": ["Financial Knowledge Base"],
+            "sources": FALLBACK_SOURCES,
             "session_id": session_id
         }
     
-    async def _get_ollama_response(self, question: str, session_id: str) -> str:
-        """Get response from Ollama with conversation history"""
-        # Get or create chat session
-        if session_id not in self.chat_sessions:
-            self.chat_sessions[session_id] = [
-                {"role": "system", "content": SYSTEM_PROMPT.format(context=FINANCIAL_KNOWLEDGE)}
-            ]
+    async def stream_answer(self, question: str, session_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Stream an answer token by token.
+
+        Yields {"token": str} events as the provider produces text, then a final
+        {"done": True, "answer", "sources", "session_id", "error"} event with the full
+        answer. Falls back to the pattern-matching response if the provider fails
+        or ends without producing any output; if it fails part-way, the final event
+        carries the partial answer and an `error` message. Only completed answers
+        are cached and added to the conversation.
+        """
+        if session_id is None:
+            session_id = str(uuid.uuid4())
+            cacheable = True
+        else:
+            cacheable = not (await self.sessions.get(session_id))["messages"]
         
-        # Add user message
-        self.chat_sessions[session_id].append({"role": "user", "content": question})
+        vector = await self._embed_question(question)
+        if cacheable:
+            cached = self.answer_cache.get(question, vector)
+            if cached:
+                await self.sessions.append(session_id, question, cached["answer"])
+                yield {"token": cached["answer"]}
+                yield {"done": True, **cached, "session_id": session_id, "error": None}
+                return
         
-        # Get response from Ollama
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{settings.ollama_base_url}/api/chat",
-                json={
-                    "model": settings.ollama_model,
-                    "messages": self.chat_sessions[session_id],
-                    "stream": False
-                }
-            )
-            result = response.json()
-            answer = result.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
+        provider_stream = None
+        sources = FALLBACK_SOURCES
+        if self.provider == "openai" and self.openai_client:
+            provider_stream = self._stream_openai_response(question, session_id, vector)
+            sources = ["OpenAI GPT-4o Financial Advisor", "Financial Knowledge Base"]
+        elif self.provider == "ollama" and self.ollama_available:
+            provider_stream = self._stream_ollama_response(question, session_id, vector)
+            sources = [f"Ollama {settings.ollama_model} Financial Advisor", "Financial Knowledge Base"]
+        elif self.provider == "gemini" and self.model:
+            provider_stream = self._stream_gemini_response(question, session_id, vector)
+            sources = ["Gemini AI Financial Advisor", "Financial Knowledge Base"]
         
-        # Add assistant response to history
-        self.chat_sessions[session_id].append({"role": "assistant", "content": answer})
+        parts = []
+        completed = False
+        error = None
+        if provider_stream is not None:
+            try:
+                async for token in provider_stream:
+                    parts.append(token)
+                    yield {"token": token}
+                if not parts:
+                    raise ValueError("provider returned an empty answer")
+                completed = True
+            except Exception as e:
+                print(f"{self.provider} streaming error: {e}")
+                if not parts:
+                    provider_stream = None
+                else:
+                    error = "The answer was interrupted before it finished. Please ask again."
         
+        if provider_stream is None:
+            answer = self._generate_fallback_response(question, FINANCIAL_KNOWLEDGE)
+            sources = FALLBACK_SOURCES
+            parts = [answer]
+            yield {"token": answer}
+        
+        answer = "".join(parts)
+        if completed:
+            await self.sessions.append(session_id, question, answer)
+            if cacheable:
+                self.answer_cache.put(question, answer, sources, vector)
+        yield {"done": True, "answer": answer, "sources": sources, "session_id": session_id, "error": error}
+    
+    async def _build_messages(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> list[dict]:
+        """System prompt + stored conversation + the new question, in chat-completions format"""
+        session = await self.sessions.get(session_id)
+        messages = [{"role": "system", "content": self._system_prompt(question, vector)}]
+        if session["summary"]:
+            messages.append({
+                "role": "system",
+                "content": "Earlier in this conversation the user asked about: " + "; ".join(session["summary"])
+            })
+        messages.extend(session["messages"])
+        messages.append({"role": "user", "content": question})
+        return messages
+    
+    async def _start_gemini_chat(self, question: str, session_id: str, vector: Optional[np.ndarray] = None):
+        """Gemini chat seeded with the stored conversation and the relevant knowledge"""
+        session = await self.sessions.get(session_id)
+        history = [
+            {"role": "user" if m["role"] == "user" else "model", "parts": [m["content"]]}
+            for m in session["messages"]
+        ]
+        model = genai.GenerativeModel(model_name=GEMINI_MODEL, system_instruction=self._system_prompt(question, vector))
+        return model.start_chat(history=history)
+    
+    async def _get_ollama_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> str:
+        """Get response from Ollama with conversation history"""
+        messages = await self._build_messages(question, session_id, vector)
+        
+        # Get response from Ollama over the shared connection pool
+        response = await self.http_client.post(
+            "/api/chat",
+            json={
+                "model": settings.ollama_model,
+                "messages": messages,
+                "stream": False
+            }
+        )
+        response.raise_for_status()
+        answer = response.json().get("message", {}).get("content")
+        if not answer:
+            raise ValueError("Ollama returned an empty answer")
+        
+        await self.sessions.append(session_id, question, answer)
         return answer
     
-    async def _get_openai_response(self, question: str, session_id: str) -> str:
+    async def _get_openai_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> str:
         """Get response from OpenAI with conversation history"""
-        # Get or create chat session
-        if session_id not in self.chat_sessions:
-            self.chat_sessions[session_id] = [
-                {"role": "system", "content": SYSTEM_PROMPT.format(context=FINANCIAL_KNOWLEDGE)}
-            ]
-        
-        # Add user message
-        self.chat_sessions[session_id].append({"role": "user", "content": question})
+        messages = await self._build_messages(question, session_id, vector)
         
         # Get response from OpenAI
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=self.chat_sessions[session_id],
+            messages=messages,
             max_tokens=1000,
             temperature=0.7
         )
         
         answer = response.choices[0].message.content
         
-        # Add assistant response to history
-        self.chat_sessions[session_id].append({"role": "assistant", "content": answer})
-        
+        await self.sessions.append(session_id, question, answer)
         return answer
     
-    async def _get_gemini_response(self, question: str, session_id: str) -> str:
+    async def _get_gemini_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> str:
         """Get response from Gemini AI with conversation history"""
-        # Get or create chat session
-        if session_id not in self.chat_sessions:
-            self.chat_sessions[session_id] = self.model.start_chat(history=[])
-        
-        chat = self.chat_sessions[session_id]
+        chat = await self._start_gemini_chat(question, session_id, vector)
         
         # Send message and get response
-        response = chat.send_message(question)
+        response = await chat.send_message_async(question)
         
+        await self.sessions.append(session_id, question, response.text)
         return response.text
     
-    def _generate_fallback_response(self, question: str, context: str) -> str:
-        """Generate a simple response when Gemini is not available"""
-        question_lower = question.lower()
-        
-        if "demat" in question_lower:
-            return "A Demat account is required to hold shares in electronic form. To open one, you need your PAN Card, Aadhaar Card, and bank account. Popular brokers include Zerodha, Groww, Upstox, and Angel One."
-        
-        elif "sip" in question_lower or "systematic" in question_lower:
-            return "SIP (Systematic Investment Plan) allows you to invest a fixed amount regularly in mutual funds. It helps average out market volatility and builds wealth through the power of compounding."
+    async def _stream_ollama_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> AsyncIterator[str]:
+        """Stream response tokens from Ollama"""
+        messages = await self._build_messages(question, session_id, vector)
         
-        elif "tax" in question_lower or "80c" in question_lower:
-            return "Under Section 80C, you can save up to ₹1.5 Lakh through investments like ELSS Mutual Funds (3-year lock-in), PPF, NSC, and life insurance premiums. Capital gains tax is 15% for short-term (<1 year) and 10% for long-term gains above ₹1 Lakh."
-        
-        elif "mutual fund" in question_lower:
-            return "Mutual funds pool money from multiple investors to invest in diversified portfolios. They're managed by professionals and are great for beginners. Start with index funds or large-cap funds for lower risk."
+        async with self.http_client.stream(
+            "POST",
+            "/api/chat",
+            json={
+                "model": settings.ollama_model,
+                "messages": messages,
+                "stream": True
+            }
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+    
+    async def _stream_openai_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> AsyncIterator[str]:
+        """Stream response tokens from OpenAI"""
+        messages = await self._build_messages(question, session_id, vector)
         
-        elif "start" in question_lower or "begin" in question_lower or "how to invest" in question_lower:
-            return "To start investing: 1) Open a Demat account with a broker like Zerodha or Groww. 2) Build an emergency fund (6-12 months expenses). 3) Start with SIPs in index funds or large-cap mutual funds. 4) Gradually learn about direct stock investing."
+        stream = await self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=1000,
+            temperature=0.7,
+            stream=True
+        )
         
-        elif "risk" in question_lower:
-            return "Key risk management strategies: 1) Diversify across sectors and asset classes. 2) Never invest more than you can afford to lose. 3) Use stop-loss orders. 4) Maintain an emergency fund. 5) Invest for the long term to ride out volatility."
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _stream_gemini_response(self, question: str, session_id: str, vector: Optional[np.ndarray] = None) -> AsyncIterator[str]:
+        """Stream response tokens from Gemini AI"""
+        chat = await self._start_gemini_chat(question, session_id, vector)
         
-        else:
-            return "I'm your financial advisor assistant! I can help you with:\n\n• **Getting Started** - Opening Demat accounts, first investments\n• **SIP & Mutual Funds** - Understanding systematic investment plans\n• **Tax Saving** - Section 80C, capital gains, tax-efficient investing\n• **Risk Management** - Diversification, stop-loss strategies\n• **Stock Market Basics** - NSE, BSE, Sensex, Nifty\n\n⚠️ Note: Gemini AI is not configured. Please add your GEMINI_API_KEY to the .env file for intelligent responses.\n\nWhat would you like to know about?"
+        response = await chat.send_message_async(question, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+    
+    def _generate_fallback_response(self, question: str, context: str) -> str:
+        """Generate a simple response when no AI provider is available"""
+        intent = FALLBACK_ROUTER.route(question)
+        if intent is None:
+            return FALLBACK_HELP
+        return intent["answer"]
 
 
 # Global RAG service instance
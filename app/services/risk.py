@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import numpy as np
+
+from app.services.timeseries import BENCHMARK_SYMBOL, PriceHistoryStore
+
+TRADING_DAYS = 252
+
+
+class CovarianceCache:
+    """LRU cache of return statistics per (symbol set, date window).
+
+    The covariance matrix, betas and daily returns depend only on which
+    symbols are held and the window, not on quantities, so every dashboard
+    view of the same portfolio reuses them and only re-weights.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+
+    def get(self, store: PriceHistoryStore, symbols: tuple[str, ...], start: date, end: date) -> dict:
+        key = (symbols, start, end)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = return_statistics(store, symbols, start, end)
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+def return_statistics(store: PriceHistoryStore, symbols: tuple[str, ...], start: date, end: date) -> dict:
+    """Daily log returns, covariance matrix and betas for symbols against the benchmark.
+
+    The benchmark is the last column of the close matrix, so all returns share
+    one calendar. Covariances are daily (not annualized).
+    """
+    _, closes = store.close_matrix([*symbols, BENCHMARK_SYMBOL], start, end)
+    returns = np.diff(np.log(closes), axis=0)
+    covariance = np.cov(returns, rowvar=False)
+    betas = covariance[:-1, -1] / covariance[-1, -1]
+    return {
+        "returns": returns[:, :-1],
+        "covariance": covariance[:-1, :-1],
+        "betas": betas
+    }
+
+
+def compute_risk(
+    store: PriceHistoryStore,
+    cache: CovarianceCache,
+    values: dict[str, float],
+    window_days: int,
+    confidence: float
+) -> dict:
+    """Volatility, correlation, beta and one-day VaR for positions given as symbol -> market value.
+
+    Volatilities are annualized. VaR is the one-day loss (in currency) not
+    exceeded with the given confidence: historical from the empirical quantile
+    of the portfolio's daily returns, parametric from a normal approximation.
+    """
+    symbols = tuple(sorted(values))
+    end = date.today()
+    start = end - timedelta(days=window_days)
+    stats = cache.get(store, symbols, start, end)
+
+    position_values = np.array([values[s] for s in symbols])
+    total = float(position_values.sum())
+    weights = position_values / total if total > 0 else np.zeros(len(symbols))
+
+    covariance = stats["covariance"]
+    daily_vol = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.nan_to_num(covariance / np.outer(daily_vol, daily_vol))
+    np.fill_diagonal(correlation, 1.0)
+
+    portfolio_daily_vol = float(np.sqrt(weights @ covariance @ weights))
+    portfolio_returns = stats["returns"] @ weights
+    historical_var = -np.quantile(portfolio_returns, 1 - confidence) * total
+    z = NormalDist().inv_cdf(confidence)
+    parametric_var = (z * portfolio_daily_vol - portfolio_returns.mean()) * total
+
+    return {
+        "symbols": list(symbols),
+        "weights": weights,
+        "volatilities": daily_vol * np.sqrt(TRADING_DAYS),
+        "betas": stats["betas"],
+        "correlation": correlation,
+        "portfolio_value": total,
+        "volatility": portfolio_daily_vol * np.sqrt(TRADING_DAYS),
+        "beta": float(weights @ stats["betas"]),
+        "var_historical": max(float(historical_var), 0.0),
+        "var_parametric": max(float(parametric_var), 0.0),
+        "observations": len(portfolio_returns)
+    }
+
+
+# Global covariance cache shared by all requests
+covariance_cache = CovarianceCache()
@@ -0,0 +1,151 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, delete
+
+from app.config import settings
+from app.database import async_session
+from app.models.user import ChatSession
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for history budgeting"""
+    return len(text) // 4 + 1
+
+
+def truncate_session(session: dict, max_tokens: int, max_summary_items: int = 5) -> dict:
+    """Drop the oldest turns until the session fits in `max_tokens`.
+
+    Dropped questions are folded into a short running summary so the model
+    keeps a hint of what was discussed earlier.
+    """
+    messages = session["messages"]
+    summary = session.get("summary", [])
+    total = sum(estimate_tokens(m["content"]) for m in messages)
+    while total > max_tokens and len(messages) > 2:
+        dropped = messages[:2]
+        messages = messages[2:]
+        total -= sum(estimate_tokens(m["content"]) for m in dropped)
+        if dropped[0]["role"] == "user":
+            summary = (summary + [dropped[0]["content"][:100]])[-max_summary_items:]
+    return {"messages": messages, "summary": summary}
+
+
+class SessionStore:
+    """Conversation history keyed by session_id.
+
+    A session is {"messages": [{"role", "content"}, ...], "summary": [str, ...]}
+    holding only user/assistant turns; the system prompt is added per request.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_tokens = max_tokens
+
+    async def get(self, session_id: str) -> dict:
+        raise NotImplementedError
+
+    async def save(self, session_id: str, session: dict):
+        raise NotImplementedError
+
+    async def append(self, session_id: str, question: str, answer: str):
+        """Record one question/answer turn, trimming the session to its token budget"""
+        session = await self.get(session_id)
+        session["messages"] = session["messages"] + [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer}
+        ]
+        await self.save(session_id, truncate_session(session, self.max_tokens))
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process LRU store with idle expiry"""
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        super().__init__(max_sessions, ttl_seconds, max_tokens)
+        self._sessions: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    async def get(self, session_id: str) -> dict:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return {"messages": [], "summary": []}
+        touched, session = entry
+        if time.monotonic() - touched > self.ttl_seconds:
+            del self._sessions[session_id]
+            return {"messages": [], "summary": []}
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def save(self, session_id: str, session: dict):
+        self._sessions[session_id] = (time.monotonic(), session)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+
+class DatabaseSessionStore(SessionStore):
+    """Store sessions in the app database so they survive restarts and are shared across workers"""
+
+    prune_every = 100
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        super().__init__(max_sessions, ttl_seconds, max_tokens)
+        self._saves = 0
+
+    async def get(self, session_id: str) -> dict:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        async with async_session() as db:
+            result = await db.execute(
+                select(ChatSession.data).where(
+                    ChatSession.session_id == session_id,
+                    ChatSession.updated_at >= cutoff
+                )
+            )
+            data = result.scalar_one_or_none()
+        if data is None:
+            return {"messages": [], "summary": []}
+        return json.loads(data)
+
+    async def save(self, session_id: str, session: dict):
+        async with async_session() as db:
+            row = await db.get(ChatSession, session_id)
+            if row is None:
+                row = ChatSession(session_id=session_id)
+                db.add(row)
+            row.data = json.dumps(session)
+            row.updated_at = datetime.utcnow()
+            await db.commit()
+
+            self._saves += 1
+            if self._saves % self.prune_every == 0:
+                await self._prune(db)
+
+    async def _prune(self, db):
+        """Delete expired sessions and anything beyond the newest `max_sessions`"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        await db.execute(delete(ChatSession).where(ChatSession.updated_at < cutoff))
+        keep = (
+            select(ChatSession.session_id)
+            .order_by(ChatSession.updated_at.desc())
+            .limit(self.max_sessions)
+        )
+        await db.execute(delete(ChatSession).where(ChatSession.session_id.not_in(keep)))
+        await db.commit()
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """Build the session store selected by `chat_session_backend` ("memory" or "database")"""
+    backend = (backend or settings.chat_session_backend).lower()
+    store_class = DatabaseSessionStore if backend == "database" else InMemorySessionStore
+    return store_class(
+        max_sessions=settings.chat_max_sessions,
+        ttl_seconds=settings.chat_session_ttl,
+        max_tokens=settings.chat_max_session_tokens
+    )
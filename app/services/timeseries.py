@@ -0,0 +1,170 @@
+import re
+import zlib
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.schemas import SYMBOL_REGEX
+from app.services.prices import MOCK_INDEX_DATA, MOCK_STOCK_DATA, SimulatedPriceFeed
+
+FIELDS = ("dates", "open", "high", "low", "close", "volume")
+BENCHMARK_SYMBOL = "NIFTY50"
+SIMULATION_VERSION = "2"
+SYMBOL_PATTERN = re.compile(SYMBOL_REGEX)
+
+
+def simulate_ohlcv(symbol: str, end: date, years: int) -> dict[str, np.ndarray]:
+    """Simulated daily OHLCV over business days, ending at the symbol's mock price.
+
+    Daily log returns are beta * market + idiosyncratic noise, where the market
+    factor is the (seeded) benchmark index series, so simulated stocks are
+    correlated with each other and with the index. The same symbol and date
+    range always produce the same series.
+    """
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    start = end - timedelta(days=365 * years)
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    days = days[np.is_busday(days)]
+    n = len(days)
+
+    market_rng = np.random.default_rng(zlib.crc32(BENCHMARK_SYMBOL.encode()))
+    market = market_rng.normal(0.11 / 252, 0.16 / np.sqrt(252), n)
+    if symbol == BENCHMARK_SYMBOL:
+        returns = market
+        sigma = 0.16 / np.sqrt(252)
+    else:
+        beta = rng.uniform(0.6, 1.4)
+        idiosyncratic = rng.uniform(0.12, 0.28) / np.sqrt(252)
+        returns = beta * market + rng.normal(rng.uniform(-0.02, 0.04) / 252, idiosyncratic, n)
+        sigma = np.sqrt((beta * 0.16) ** 2 / 252 + idiosyncratic ** 2)
+    log_path = np.cumsum(returns)
+    close = SimulatedPriceFeed().base_price(symbol) * np.exp(log_path - log_path[-1])
+
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, sigma / 4, n - 1))
+    spread = np.abs(rng.normal(0, sigma, (2, n)))
+    return {
+        "dates": days,
+        "open": np.round(open_, 2),
+        "high": np.round(np.maximum(open_, close) * (1 + spread[0]), 2),
+        "low": np.round(np.minimum(open_, close) * (1 - spread[1]), 2),
+        "close": np.round(close, 2),
+        "volume": rng.lognormal(13, 0.5, n).astype(np.int64)
+    }
+
+
+class PriceHistoryStore:
+    """Daily OHLCV per symbol, stored column-wise as one .npy file per field.
+
+    Files are opened memory-mapped, so slicing a date window reads only the
+    pages it touches. Symbols without stored history are filled from the
+    simulated generator on first access; only known symbols are written to
+    disk, any other symbol is simulated in memory. Loaded series are kept in
+    an LRU cache that is dropped whenever the latest session date moves, so
+    outdated simulated series get regenerated.
+    """
+
+    def __init__(self, path: str, years: int, max_entries: int = 256):
+        self.path = Path(path)
+        self.years = years
+        self.max_entries = max_entries
+        self._series: OrderedDict[str, dict[str, np.ndarray]] = OrderedDict()
+        self._session: Optional[date] = None
+
+    def write(self, symbol: str, series: dict[str, np.ndarray], simulated: bool = False):
+        """Store a full series for a symbol, replacing any existing one"""
+        symbol = self._validate(symbol)
+        directory = self.path / symbol
+        directory.mkdir(parents=True, exist_ok=True)
+        for field in FIELDS:
+            np.save(directory / f"{field}.npy", series[field])
+        marker = directory / "SIMULATED"
+        if simulated:
+            marker.write_text(SIMULATION_VERSION)
+        else:
+            marker.unlink(missing_ok=True)
+        self._series.pop(symbol, None)
+
+    def series(self, symbol: str) -> dict[str, np.ndarray]:
+        """All stored fields for a symbol, memory-mapped"""
+        symbol = self._validate(symbol)
+        session = self._last_session()
+        if session != self._session:
+            self._series.clear()
+            self._session = session
+        cached = self._series.get(symbol)
+        if cached is not None:
+            self._series.move_to_end(symbol)
+            return cached
+        directory = self.path / symbol
+        if (directory / "close.npy").exists() and not self._is_outdated(directory):
+            series = {field: np.load(directory / f"{field}.npy", mmap_mode="r") for field in FIELDS}
+        elif symbol in MOCK_STOCK_DATA or symbol in MOCK_INDEX_DATA:
+            self.write(symbol, simulate_ohlcv(symbol, session, self.years), simulated=True)
+            series = {field: np.load(directory / f"{field}.npy", mmap_mode="r") for field in FIELDS}
+        else:
+            series = simulate_ohlcv(symbol, session, self.years)
+        self._series[symbol] = series
+        if len(self._series) > self.max_entries:
+            self._series.popitem(last=False)
+        return series
+
+    def get(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> dict[str, np.ndarray]:
+        """Fields for a symbol restricted to start <= date <= end"""
+        series = self.series(symbol)
+        lo, hi = self._window(series["dates"], start, end)
+        return {field: series[field][lo:hi] for field in FIELDS}
+
+    def close_matrix(
+        self,
+        symbols: list[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Closes for several symbols on their common dates: (dates, matrix[dates, symbols])"""
+        windows = [self.get(symbol, start, end) for symbol in symbols]
+        dates = windows[0]["dates"]
+        for window in windows[1:]:
+            dates = np.intersect1d(dates, window["dates"], assume_unique=True)
+        matrix = np.empty((len(dates), len(symbols)))
+        for column, window in enumerate(windows):
+            index = np.searchsorted(window["dates"], dates)
+            matrix[:, column] = window["close"][index]
+        return dates, matrix
+
+    def _window(self, dates: np.ndarray, start: Optional[date], end: Optional[date]) -> tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return lo, hi
+
+    def _validate(self, symbol: str) -> str:
+        symbol = symbol.upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return symbol
+
+    def _last_session(self) -> date:
+        return np.busday_offset(np.datetime64(date.today(), "D"), 0, roll="backward").astype(date)
+
+    def _is_outdated(self, directory: Path) -> bool:
+        """Simulated series are regenerated once they stop reaching the latest session or the generator changes"""
+        marker = directory / "SIMULATED"
+        if not marker.exists():
+            return False
+        if marker.read_text() != SIMULATION_VERSION:
+            return True
+        dates = np.load(directory / "dates.npy", mmap_mode="r")
+        return dates[-1] < np.datetime64(self._last_session(), "D")
+
+
+# Global price history store
+price_history = PriceHistoryStore(
+    settings.price_history_path,
+    settings.price_history_years,
+    max_entries=settings.price_history_cache_size
+)
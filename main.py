@@ -4,7 +4,12 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import init_db
+from app.database import init_db, async_session
+from app.services.history import history_writer
+from app.services.calculator import shutdown_simulation_pool
+from app.services.alerts import alert_engine
+from app.services.rag import rag_service
+from app.services.portfolio import sync_positions
 from app.routes import auth_router, calculator_router, chat_router, pages_router, portfolio_router
 
 
@@ -12,9 +17,18 @@ from app.routes import auth_router, calculator_router, chat_router, pages_router
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    async with async_session() as db:
+        await sync_positions(db)
+    await history_writer.start()
+    await rag_service.start()
+    if settings.alerts_enabled:
+        await alert_engine.start()
     yield
     # Shutdown
-    pass
+    await alert_engine.stop()
+    await rag_service.close()
+    await history_writer.stop()
+    shutdown_simulation_pool()
 
 
 app = FastAPI(
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at throwaway storage before any app module reads settings
+_tmp = tempfile.mkdtemp(prefix="finology-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp}/test.db")
+os.environ.setdefault("PRICE_HISTORY_PATH", os.path.join(_tmp, "price_history"))
+os.environ.setdefault("AI_PROVIDER", "none")
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("ALERTS_ENABLED", "false")
+
+
+
+@pytest.fixture
+def client(tmp_path):
+    """TestClient with the app lifespan running, logged in as a fresh user"""
+    from fastapi.testclient import TestClient
+    from app.services.rag import rag_service
+    from main import app
+
+    rag_service.index.path = tmp_path / "chroma_db"
+    with TestClient(app) as client:
+        username = f"user{tmp_path.name[-12:].replace('-', '').replace('_', '')}"
+        client.post("/api/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "secret1"})
+        client.post("/api/auth/login", json={"username": username, "password": "secret1"})
+        yield client
@@ -0,0 +1,74 @@
+import pytest
+
+from app.services import alerts
+from app.services.alerts import AlertEngine
+
+
+class FakeQuotes:
+    def __init__(self, *ticks: float):
+        self.ticks = list(ticks)
+
+    async def get_many(self, symbols: list[str]) -> dict[str, float]:
+        price = self.ticks.pop(0) if len(self.ticks) > 1 else self.ticks[0]
+        return {symbol: price for symbol in symbols}
+
+
+def watch(client, symbol: str, target: float) -> dict:
+    response = client.post("/api/portfolio/watchlist", json={
+        "symbol": symbol, "company_name": symbol, "target_price": target
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_add_and_remove_are_ignored_when_not_running():
+    engine = AlertEngine(FakeQuotes(100), interval=3600)
+    engine.add(1, 1, "TCS", 3500)
+    assert engine.symbols() == []
+    engine.remove(1)
+
+
+def test_targets_added_through_other_workers_fire_after_reload(client):
+    engine = AlertEngine(FakeQuotes(3000, 4000), interval=3600, reload_every=1)
+    client.portal.call(engine.start)
+    try:
+        # This worker's own engine is disabled, like any worker but the alerting one
+        item = watch(client, "TCS", 3500)
+        client.portal.call(engine.check)
+        client.portal.call(engine.check)
+    finally:
+        client.portal.call(engine.stop)
+
+    fired = client.get("/api/portfolio/alerts").json()
+    assert [(a["watchlist_id"], a["target_price"], a["direction"]) for a in fired] == [
+        (item["id"], 3500, "above")
+    ]
+
+
+def test_alerts_that_fail_to_save_are_retried(client, monkeypatch):
+    engine = AlertEngine(FakeQuotes(3000, 4000), interval=3600, reload_every=1000)
+    item = watch(client, "INFY", 3500)
+    client.portal.call(engine.start)
+    try:
+        client.portal.call(engine.check)
+
+        session = alerts.async_session
+        calls = []
+
+        def flaky_session():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("database unavailable")
+            return session()
+
+        monkeypatch.setattr(alerts, "async_session", flaky_session)
+        with pytest.raises(ConnectionError):
+            client.portal.call(engine.check)
+        assert [a.watchlist_id for a in engine._unsaved] == [item["id"]]
+
+        client.portal.call(engine.check)
+        assert engine._unsaved == []
+    finally:
+        client.portal.call(engine.stop)
+
+    assert [a["watchlist_id"] for a in client.get("/api/portfolio/alerts").json()] == [item["id"]]
@@ -0,0 +1,14 @@
+def signup(client, username: str, email: str):
+    return client.post("/api/auth/signup", json={"username": username, "email": email, "password": "secret1"})
+
+
+def test_duplicate_signup_names_the_taken_field(client):
+    assert signup(client, "emailfan", "fan@example.com").status_code == 200
+
+    response = signup(client, "emailfan", "other@example.com")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+    response = signup(client, "someoneelse", "fan@example.com")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from app.schemas import AmortizationInput
+from app.services.calculator import amortization_schedule
+
+
+def schedule(**loan) -> dict[str, np.ndarray]:
+    segments = list(amortization_schedule(AmortizationInput(**loan)))
+    return {column: np.concatenate([s[column] for s in segments]) for column in segments[0]}
+
+
+def test_reset_after_prepayment_keeps_the_shortened_tenure():
+    rows = schedule(
+        principal=100000, rate=12, tenure_months=12,
+        prepayments=[{"month": 3, "amount": 20000}],
+        rate_resets=[{"month": 6, "rate": 6}]
+    )
+    assert round(rows["payment"][5]) == 7994
+    assert rows["month"][-1] == 10
+    assert rows["balance"][-1] == 0
+
+
+@pytest.mark.parametrize("loan", [
+    {"principal": 250000, "rate": 9.5, "tenure_months": 60},
+    {
+        "principal": 100000, "rate": 12, "tenure_months": 24,
+        "prepayments": [{"month": 4, "amount": 15000}, {"month": 9, "amount": 5000}],
+        "rate_resets": [{"month": 7, "rate": 8}, {"month": 13, "rate": 0}]
+    },
+])
+def test_principal_and_prepayments_repay_the_loan(loan):
+    rows = schedule(**loan)
+    assert rows["principal"].sum() + rows["prepayment"].sum() == pytest.approx(loan["principal"])
+    assert rows["balance"][-1] == 0
+
+
+def test_reset_in_month_one_sets_the_starting_rate():
+    rows = schedule(principal=100000, rate=12, tenure_months=12, rate_resets=[{"month": 1, "rate": 0}])
+    assert rows["interest"].sum() == 0
+    assert rows["payment"][0] == pytest.approx(100000 / 12)
+
+
+def test_prepayment_larger_than_the_balance_closes_the_loan():
+    rows = schedule(
+        principal=100000, rate=12, tenure_months=12,
+        prepayments=[{"month": 2, "amount": 500000}]
+    )
+    assert rows["month"][-1] == 2
+    assert rows["prepayment"][-1] == pytest.approx(rows["balance"][0] - rows["principal"][1])
+    assert rows["balance"][-1] == 0
+    assert rows["principal"].sum() + rows["prepayment"].sum() == pytest.approx(100000)
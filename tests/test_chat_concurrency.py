@@ -0,0 +1,47 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.services.rag import rag_service
+from main import app
+
+DELAY = 0.5
+CONCURRENT = 10
+
+
+class SlowCompletions:
+    """Stand-in for AsyncOpenAI().chat.completions that takes DELAY seconds per call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(DELAY)
+        message = SimpleNamespace(content=f"answer {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_concurrent_ask_calls_overlap(monkeypatch):
+    completions = SlowCompletions()
+    monkeypatch.setattr(rag_service, "provider", "openai")
+    monkeypatch.setattr(rag_service, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    async def ask_all() -> tuple[list[httpx.Response], float]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.post("/api/chat/ask", json={"message": f"question number {i}"})
+                for i in range(CONCURRENT)
+            ])
+            return responses, time.perf_counter() - start
+
+    responses, elapsed = asyncio.run(ask_all())
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT
+    assert completions.calls == CONCURRENT
+    # Serialized calls would take CONCURRENT * DELAY = 5 s
+    assert elapsed < DELAY * 3, f"{CONCURRENT} concurrent asks took {elapsed:.2f}s"
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+
+from app.services.rag import FALLBACK_SOURCES, rag_service
+
+
+async def collect(question: str) -> list[dict]:
+    return [event async for event in rag_service.stream_answer(question)]
+
+
+def test_interrupted_stream_is_flagged_and_not_cached(monkeypatch):
+    async def broken_stream(question, session_id, vector=None):
+        yield "Compound interest "
+        yield "is "
+        raise ConnectionError("provider dropped the connection")
+
+    monkeypatch.setattr(rag_service, "provider", "openai")
+    monkeypatch.setattr(rag_service, "openai_client", object())
+    monkeypatch.setattr(rag_service, "_stream_openai_response", broken_stream)
+    rag_service.answer_cache.clear()
+
+    events = asyncio.run(collect("What is compound interest?"))
+
+    done = events[-1]
+    assert [e["token"] for e in events[:-1]] == ["Compound interest ", "is "]
+    assert done["done"] and done["answer"] == "Compound interest is "
+    assert done["error"]
+    assert len(rag_service.answer_cache) == 0
+
+
+def test_completed_stream_is_cached(monkeypatch):
+    async def good_stream(question, session_id, vector=None):
+        yield "A full "
+        yield "answer."
+
+    monkeypatch.setattr(rag_service, "provider", "openai")
+    monkeypatch.setattr(rag_service, "openai_client", object())
+    monkeypatch.setattr(rag_service, "_stream_openai_response", good_stream)
+    rag_service.answer_cache.clear()
+
+    done = asyncio.run(collect("What is an index fund?"))[-1]
+
+    assert done["answer"] == "A full answer." and done["error"] is None
+    assert len(rag_service.answer_cache) == 1
+    rag_service.answer_cache.clear()
+
+
+def use_ollama(monkeypatch, handler):
+    monkeypatch.setattr(rag_service, "provider", "ollama")
+    monkeypatch.setattr(rag_service, "ollama_available", True)
+    monkeypatch.setattr(rag_service, "http_client", httpx.AsyncClient(
+        base_url="http://ollama.test", transport=httpx.MockTransport(handler)
+    ))
+    rag_service.answer_cache.clear()
+
+
+def not_found(request):
+    return httpx.Response(404, json={"error": "model 'llama3.2' not found"})
+
+
+def test_provider_http_error_falls_back_and_is_not_cached(monkeypatch):
+    use_ollama(monkeypatch, not_found)
+
+    result = asyncio.run(rag_service.get_answer("What is a mutual fund?"))
+    assert result["sources"] == FALLBACK_SOURCES
+    assert "couldn't generate" not in result["answer"]
+
+    done = asyncio.run(collect("What is a mutual fund?"))[-1]
+    assert done["sources"] == FALLBACK_SOURCES and done["answer"] and done["error"] is None
+    assert len(rag_service.answer_cache) == 0
+
+
+def test_empty_stream_is_not_cached_or_remembered(monkeypatch):
+    use_ollama(monkeypatch, lambda request: httpx.Response(200, text='{"done": true}\n'))
+
+    async def ask():
+        events = await collect("What is an ETF?")
+        return events[-1], await rag_service.sessions.get(events[-1]["session_id"])
+
+    done, session = asyncio.run(ask())
+    assert done["sources"] == FALLBACK_SOURCES and done["answer"]
+    assert session["messages"] == []
+    assert len(rag_service.answer_cache) == 0
+
+
+def test_completed_stream_is_remembered_in_the_session(monkeypatch):
+    async def good_stream(question, session_id, vector=None):
+        yield "Diversify."
+
+    monkeypatch.setattr(rag_service, "provider", "openai")
+    monkeypatch.setattr(rag_service, "openai_client", object())
+    monkeypatch.setattr(rag_service, "_stream_openai_response", good_stream)
+    rag_service.answer_cache.clear()
+
+    async def ask():
+        done = (await collect("How do I reduce risk?"))[-1]
+        return await rag_service.sessions.get(done["session_id"])
+
+    session = asyncio.run(ask())
+    assert [m["content"] for m in session["messages"]] == ["How do I reduce risk?", "Diversify."]
+    rag_service.answer_cache.clear()
@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import async_session
+from app.models.user import ChatHistory
+from app.services import history
+from app.services.history import HistoryWriter
+
+
+def chat_row(session_id: str) -> dict:
+    return {"user_id": 1, "session_id": session_id, "question": "q", "answer": "a"}
+
+
+async def count_rows(session_id: str) -> int:
+    async with async_session() as db:
+        query = select(func.count()).select_from(ChatHistory).where(ChatHistory.session_id == session_id)
+        return (await db.execute(query)).scalar_one()
+
+
+@pytest.fixture
+def session_id() -> str:
+    return str(uuid.uuid4())
+
+
+def test_rows_queued_before_stop_are_flushed(client, session_id):
+    writer = HistoryWriter(max_pending=100, batch_size=1000, flush_interval=60)
+
+    async def write():
+        await writer.start()
+        for _ in range(5):
+            await writer.add(ChatHistory, **chat_row(session_id))
+        pending = await count_rows(session_id)
+        await writer.stop()
+        return pending, await count_rows(session_id)
+
+    assert client.portal.call(write) == (0, 5)
+
+
+def test_add_waits_while_the_buffer_is_full(client, session_id):
+    writer = HistoryWriter(max_pending=2, batch_size=1000, flush_interval=60)
+
+    async def fill():
+        writer.queue = asyncio.Queue(maxsize=writer.max_pending)  # started, but nothing drains it
+        await writer.add(ChatHistory, **chat_row(session_id))
+        await writer.add(ChatHistory, **chat_row(session_id))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(writer.add(ChatHistory, **chat_row(session_id)), 0.2)
+        return writer.queue.qsize()
+
+    assert client.portal.call(fill) == 2
+
+
+def test_add_writes_through_when_not_started(client, session_id):
+    writer = HistoryWriter(max_pending=100, batch_size=1000, flush_interval=60)
+
+    async def write():
+        await writer.add(ChatHistory, **chat_row(session_id))
+        return await count_rows(session_id)
+
+    assert client.portal.call(write) == 1
+
+
+def test_failed_flush_is_retried_once(client, session_id, monkeypatch):
+    writer = HistoryWriter(max_pending=100, batch_size=1000, flush_interval=60, retry_delay=0)
+    calls = []
+
+    def flaky_session():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("database unavailable")
+        return async_session()
+
+    monkeypatch.setattr(history, "async_session", flaky_session)
+
+    async def write():
+        await writer.add(ChatHistory, **chat_row(session_id))
+        return await count_rows(session_id)
+
+    assert client.portal.call(write) == 1
+    assert len(calls) == 2
@@ -0,0 +1,25 @@
+from app.services.intents import IntentRouter
+from app.services.rag import FALLBACK_ROUTER
+
+
+def route_name(question: str):
+    intent = FALLBACK_ROUTER.route(question)
+    return intent["name"] if intent else None
+
+
+def test_hand_written_answers_beat_overlapping_sections():
+    assert route_name("how do i open a demat account") == "demat"
+    assert route_name("what is the capital gains tax rate") == "tax"
+    assert route_name("should I start a SIP in a mutual fund") == "sip"
+
+
+def test_sections_answer_questions_without_a_hand_written_intent():
+    assert route_name("what is a stop loss order") == "Stop Loss"
+    assert route_name("how much should my emergency fund be") == "Emergency Fund"
+
+
+def test_keywords_match_whole_words_only():
+    assert route_name("which taxi app is cheapest") is None
+    router = IntentRouter([{"name": "sip", "keywords": ["sip"], "answer": "", "weight": 1.0}])
+    assert router.route("gossip") is None
+    assert router.route("a monthly SIP") is not None
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+
+
+def add_lot(client, symbol: str, quantity: float, buy_price: float, buy_date: str = "2024-01-05"):
+    response = client.post("/api/portfolio/", json={
+        "symbol": symbol, "company_name": symbol, "quantity": quantity,
+        "buy_price": buy_price, "buy_date": buy_date
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_summary_and_snapshot_agree_on_performers(client):
+    # Per lot, TCS would be both the best (cheap lot) and the worst (expensive lot)
+    add_lot(client, "TCS", 1, 1000)
+    add_lot(client, "TCS", 10, 9000)
+    add_lot(client, "INFY", 5, 1500)
+    add_lot(client, "WIPRO", 5, 450)
+
+    summary = client.get("/api/portfolio/summary").json()
+    snapshot = client.get("/api/portfolio/snapshot").json()
+
+    assert snapshot["summary"] == summary
+    assert summary["holdings_count"] == 4
+    assert summary["worst_performer"] == "TCS"
+    assert summary["top_performer"] != "TCS"
+
+
+def test_concurrent_lots_all_reach_the_position(client):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.database import DATABASE_URL
+    from app.models.portfolio import PortfolioPosition
+    from app.schemas import PortfolioHoldingCreate
+    from app.services import portfolio as portfolio_service
+
+    user_id = client.get("/api/auth/me").json()["id"]
+    lot = PortfolioHoldingCreate(
+        symbol="HDFC", company_name="HDFC", quantity=2, buy_price=1500, buy_date="2024-01-05"
+    )
+
+    async def add_lots():
+        engine = create_async_engine(DATABASE_URL)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def add():
+            async with sessions() as db:
+                await portfolio_service.create_holding(db, user_id, lot)
+
+        await asyncio.gather(*(add() for _ in range(16)))
+        async with sessions() as db:
+            position = (await db.execute(
+                select(PortfolioPosition).where(PortfolioPosition.user_id == user_id)
+            )).scalar_one()
+        await engine.dispose()
+        return position
+
+    position = asyncio.run(add_lots())
+    assert position.lots == 16
+    assert position.quantity == 32
+    assert position.total_cost == 32 * 1500
+
+
+def test_future_buy_dates_are_rejected(client):
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    response = client.post("/api/portfolio/", json={
+        "symbol": "TCS", "company_name": "TCS", "quantity": 1, "buy_price": 3500, "buy_date": tomorrow
+    })
+    assert response.status_code == 422
+    holding = add_lot(client, "TCS", 1, 3500)
+    response = client.put(f"/api/portfolio/{holding['id']}", json={"buy_date": tomorrow})
+    assert response.status_code == 422
+
+
+def test_performance_without_lots_on_a_session_is_empty():
+    from app.services.performance import compute_performance
+    from app.services.timeseries import price_history
+
+    next_session = np.busday_offset(np.datetime64(date.today(), "D"), 1, roll="forward")
+    performance = compute_performance(
+        price_history,
+        np.array(["TCS"]),
+        np.array([1.0]),
+        np.array([3500.0]),
+        np.array([next_session], dtype="datetime64[D]")
+    )
+    assert performance is None
+
+
+def test_symbols_without_price_history_are_rejected(client):
+    lot = {"company_name": "Berkshire", "quantity": 1, "buy_price": 100, "buy_date": "2024-01-05"}
+    assert client.post("/api/portfolio/", json={"symbol": "BRK.B", **lot}).status_code == 422
+    holding = add_lot(client, "TCS", 1, 3500)
+    assert client.put(f"/api/portfolio/{holding['id']}", json={"symbol": "BRK.B"}).status_code == 422
+    response = client.post("/api/portfolio/watchlist", json={"symbol": "../x", "company_name": "x"})
+    assert response.status_code == 422
+
+
+def test_analytics_skip_stored_symbols_without_history(client):
+    from app.database import async_session
+    from app.schemas import PortfolioHoldingCreate
+    from app.services.portfolio import create_holding
+
+    user_id = client.get("/api/auth/me").json()["id"]
+    add_lot(client, "TCS", 1, 3500)
+
+    async def add_legacy_lot():
+        async with async_session() as db:
+            lot = PortfolioHoldingCreate.model_construct(
+                symbol="BRK.B", company_name="Berkshire", quantity=1, buy_price=100,
+                buy_date="2024-01-05", notes=None
+            )
+            await create_holding(db, user_id, lot)
+
+    client.portal.call(add_legacy_lot)
+    assert client.get("/api/portfolio/performance").status_code == 200
+    assert client.get("/api/portfolio/risk").status_code == 200
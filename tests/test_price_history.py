@@ -0,0 +1,45 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.services.timeseries import PriceHistoryStore
+
+
+def test_unknown_symbols_are_simulated_in_memory(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), years=1)
+    series = store.series("MADEUP")
+    assert len(series["close"]) > 200
+    assert not (tmp_path / "MADEUP").exists()
+    store.series("TCS")
+    assert (tmp_path / "TCS" / "close.npy").exists()
+
+
+def test_invalid_symbols_are_rejected(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), years=1)
+    for symbol in ("..", "../etc", "A/B", "", "X" * 21):
+        with pytest.raises(ValueError):
+            store.series(symbol)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_series_cache_is_bounded(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), years=1, max_entries=3)
+    for symbol in ("AAA", "BBB", "CCC", "DDD"):
+        store.series(symbol)
+    assert list(store._series) == ["BBB", "CCC", "DDD"]
+
+
+def test_new_session_reloads_outdated_series(tmp_path, monkeypatch):
+    store = PriceHistoryStore(str(tmp_path), years=1)
+    monkeypatch.setattr(store, "_last_session", lambda: date(2025, 3, 7))
+    assert store.series("TCS")["dates"][-1] == np.datetime64("2025-03-07")
+    monkeypatch.setattr(store, "_last_session", lambda: date(2025, 3, 10))
+    assert store.series("TCS")["dates"][-1] == np.datetime64("2025-03-10")
+
+
+def test_history_route_rejects_bad_symbols(client):
+    assert client.get("/api/portfolio/history/%2E%2E").status_code == 400
+    assert client.get("/api/portfolio/history/BAD$SYM").status_code == 400
+    assert client.get("/api/portfolio/quotes", params={"symbols": "TCS,../x"}).status_code == 400
+    assert client.get("/api/portfolio/history/tcs").json()["symbol"] == "TCS"
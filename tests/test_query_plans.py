@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Index, create_engine, insert, select, text
+
+from app.database import Base
+from app.migrations import composite_indexes, upgrade
+from app.models import ChatHistory, PortfolioHolding, StockWatchlist
+
+USERS = 200
+
+# Single-column indexes the tables had before 0002_composite_indexes
+LEGACY_INDEXES = {
+    "chat_history": "ix_chat_history_user_id",
+    "portfolio_holdings": "ix_portfolio_holdings_user_id",
+    "stock_watchlist": "ix_stock_watchlist_user_id",
+}
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """Pre-migration schema with seeded rows, upgraded and then analyzed"""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        for model in (ChatHistory, PortfolioHolding, StockWatchlist):
+            for index in model.__table__.indexes:
+                if len(index.columns) > 1:
+                    index.drop(conn)
+        for table, index in LEGACY_INDEXES.items():
+            conn.execute(text(f"CREATE INDEX {index} ON {table} (user_id)"))
+
+        start = datetime(2025, 1, 1)
+        conn.execute(insert(ChatHistory), [
+            {
+                "user_id": user, "session_id": f"{user}-{session}", "question": "q", "answer": "a",
+                "created_at": start + timedelta(minutes=user * 100 + session * 10 + n)
+            }
+            for user in range(USERS) for session in range(5) for n in range(10)
+        ])
+        conn.execute(insert(PortfolioHolding), [
+            {
+                "user_id": user, "symbol": f"S{n}", "company_name": "c",
+                "quantity": 1, "buy_price": 100, "buy_date": start.date()
+            }
+            for user in range(USERS) for n in range(10)
+        ])
+        conn.execute(insert(StockWatchlist), [
+            {"user_id": user, "symbol": f"S{n}", "company_name": "c"}
+            for user in range(USERS) for n in range(10)
+        ])
+
+        upgrade(conn)
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, query) -> str:
+    sql = query.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_legacy_indexes_are_dropped(engine):
+    with engine.connect() as conn:
+        names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert names.isdisjoint(LEGACY_INDEXES.values())
+
+
+def test_composite_migration_creates_only_its_own_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bare.db'}")
+    # An index declared on the model later must be left to its own migration
+    later = Index("ix_chat_history_later", ChatHistory.__table__.c.answer)
+    try:
+        with engine.begin() as conn:
+            for model in (ChatHistory, PortfolioHolding, StockWatchlist):
+                model.__table__.create(conn)
+                for index in list(model.__table__.indexes):
+                    index.drop(conn)
+            composite_indexes(conn)
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    finally:
+        ChatHistory.__table__.indexes.discard(later)
+        engine.dispose()
+    assert {name for name in names if not name.startswith("sqlite_")} == {
+        "ix_chat_history_user_session_created",
+        "ix_chat_history_user_created",
+        "ix_portfolio_holdings_user_symbol",
+        "ix_stock_watchlist_user_symbol",
+    }
+
+
+def test_session_history_reads_the_session_index_in_order(engine):
+    plan = query_plan(engine, select(ChatHistory).where(
+        ChatHistory.user_id == 7,
+        ChatHistory.session_id == "7-3"
+    ).order_by(ChatHistory.created_at.desc()).limit(50))
+    assert "ix_chat_history_user_session_created" in plan
+    assert "USE TEMP B-TREE" not in plan
+
+
+def test_user_history_reads_the_user_index_in_order(engine):
+    plan = query_plan(engine, select(ChatHistory).where(
+        ChatHistory.user_id == 7
+    ).order_by(ChatHistory.created_at.desc()).limit(50))
+    assert "ix_chat_history_user_created" in plan
+    assert "USE TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("model, index", [
+    (PortfolioHolding, "ix_portfolio_holdings_user_symbol"),
+    (StockWatchlist, "ix_stock_watchlist_user_symbol"),
+])
+def test_per_user_lists_use_the_composite_index(engine, model, index):
+    for query in (
+        select(model).where(model.user_id == 7),
+        select(model).where(model.user_id == 7, model.symbol == "S3"),
+    ):
+        plan = query_plan(engine, query)
+        assert index in plan
+        assert "USE TEMP B-TREE" not in plan
@@ -0,0 +1,33 @@
+import asyncio
+
+from app.services.prices import PriceProvider, QuoteCache
+
+
+class FixedFeed(PriceProvider):
+    async def fetch(self, symbols):
+        return {symbol: 100.0 for symbol in symbols}
+
+
+def test_quote_cache_is_bounded():
+    cache = QuoteCache(FixedFeed(), ttl=15, stale_ttl=60, max_entries=50)
+
+    async def flood():
+        for batch in range(20):
+            await cache.get_many([f"SYM{batch}_{i}" for i in range(200)])
+
+    asyncio.run(flood())
+    assert len(cache._quotes) == 50
+
+
+def test_quotes_past_stale_ttl_are_swept(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.prices.time.monotonic", lambda: clock[0])
+    cache = QuoteCache(FixedFeed(), ttl=15, stale_ttl=60)
+
+    async def run():
+        await cache.get_many(["OLD1", "OLD2"])
+        clock[0] += 61
+        await cache.get_many(["NEW"])
+
+    asyncio.run(run())
+    assert list(cache._quotes) == ["NEW"]
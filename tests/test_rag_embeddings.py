@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app.services.knowledge import HashingEmbedder, KnowledgeIndex
+from app.services.rag import FINANCIAL_KNOWLEDGE, rag_service
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder that records the thread of every query embedding"""
+
+    def __init__(self):
+        super().__init__()
+        self.query_threads: list[str] = []
+
+    def embed(self, texts):
+        if len(texts) == 1:
+            self.query_threads.append(threading.current_thread().name)
+        return super().embed(texts)
+
+
+class InstantCompletions:
+    async def create(self, **kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="an answer"))])
+
+
+def test_question_is_embedded_once_per_request_off_the_event_loop(monkeypatch, tmp_path):
+    embedder = CountingEmbedder()
+    index = KnowledgeIndex(str(tmp_path), embedder=embedder)
+    index.load_or_build(FINANCIAL_KNOWLEDGE)
+    embedder.query_threads.clear()
+
+    monkeypatch.setattr(rag_service, "index", index)
+    monkeypatch.setattr(rag_service.answer_cache, "embedder", embedder)
+    monkeypatch.setattr(rag_service, "provider", "openai")
+    monkeypatch.setattr(rag_service, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=InstantCompletions())))
+    rag_service.answer_cache.clear()
+
+    async def ask():
+        # Miss: cache lookup, knowledge search and cache insert share one embedding
+        await rag_service.get_answer("How does a systematic investment plan work?")
+        # Near-duplicate lookup against a non-empty cache
+        await rag_service.get_answer("how does systematic investment plan work")
+
+    asyncio.run(ask())
+    rag_service.answer_cache.clear()
+
+    assert len(embedder.query_threads) == 2
+    assert threading.main_thread().name not in embedder.query_threads
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.services.risk import CovarianceCache, compute_risk
+from app.services.timeseries import BENCHMARK_SYMBOL, PriceHistoryStore
+
+
+@pytest.fixture
+def store(tmp_path) -> PriceHistoryStore:
+    # Simulated series are seeded per symbol, so every run sees the same history
+    return PriceHistoryStore(str(tmp_path), years=2)
+
+
+def test_risk_statistics_are_consistent(store):
+    values = {"TCS": 50000.0, "INFY": 30000.0, "HDFCBANK": 20000.0, BENCHMARK_SYMBOL: 25000.0}
+    risk = compute_risk(store, CovarianceCache(), values, window_days=365, confidence=0.95)
+
+    assert risk["symbols"] == sorted(values)
+    assert risk["weights"].sum() == pytest.approx(1.0)
+    assert risk["portfolio_value"] == pytest.approx(sum(values.values()))
+
+    benchmark = risk["symbols"].index(BENCHMARK_SYMBOL)
+    assert risk["betas"][benchmark] == pytest.approx(1.0)
+    assert np.allclose(np.diag(risk["correlation"]), 1.0)
+    assert np.allclose(risk["correlation"], risk["correlation"].T)
+    assert risk["observations"] > 200
+    assert 0 < risk["var_parametric"] and 0 < risk["var_historical"]
+
+
+def test_statistics_are_reused_across_quantities(store):
+    cache = CovarianceCache()
+    first = compute_risk(store, cache, {"TCS": 1000.0, "INFY": 3000.0}, 365, 0.95)
+    second = compute_risk(store, cache, {"TCS": 3000.0, "INFY": 1000.0}, 365, 0.95)
+
+    assert len(cache._entries) == 1
+    assert np.allclose(first["volatilities"], second["volatilities"])
+    assert first["weights"].tolist() == pytest.approx([0.75, 0.25])